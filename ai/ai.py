@@ -1,18 +1,21 @@
 import google.generativeai as genai
 import os
+from ai.client import AIClient
 
 API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key = API_KEY)
 model = genai.GenerativeModel("gemini-2.0-flash")
 
+
+def _send(prompt):
+    # A single-turn generate call; no chat session needed per request
+    return model.generate_content(prompt).text
+
+
+client = AIClient(_send)
+
+
 def explain_legal_term(term: str) -> str:
-    try:
-        chat = model.start_chat()
-        prompt = f"Explain in 2-3 lines the legal meaning of {term}. Make it simple enough for a common man to understand."
-        response = chat.send_message(prompt)
-        return response.text
-    except Exception as e:
-        if "429" in str(e):
-            return "AI is temporarily busy. Please try again in a few seconds."
-        else:
-            return ""
+    """Explain a legal term. Raises AIError (AIBusy, AIUnavailable, AIEmptyResponse) on failure."""
+    prompt = f"Explain in 2-3 lines the legal meaning of {term}. Make it simple enough for a common man to understand."
+    return client.generate(prompt)
@@ -0,0 +1,31 @@
+"""
+AI backends by name, so the app (AI_BACKEND) and ai.prewarm (--backend) can
+run against Gemini, the local stub or any `module:function`.
+"""
+import os
+import importlib
+
+# Anything with explain_legal_term's signature (term -> str) works as a backend
+BACKENDS = {
+    "gemini": "ai.ai:explain_legal_term",
+    "stub": "ai.stub:explain_legal_term",
+}
+
+# "gemini" in production; "stub" (ai/stub.py) for load tests and local runs
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini")
+
+
+def _split(name):
+    module_name, _, attr = BACKENDS.get(name, name).partition(":")
+    return module_name, attr or "explain_legal_term"
+
+
+def load_backend(name=AI_BACKEND):
+    # Imported lazily so the stub never needs google.generativeai or an API key
+    module_name, attr = _split(name)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def backend_client(name=AI_BACKEND):
+    """The backend module's AIClient (for stats()), or None if it doesn't have one."""
+    return getattr(importlib.import_module(_split(name)[0]), "client", None)
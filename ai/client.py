@@ -0,0 +1,121 @@
+"""
+The rate-limited, retrying client shared by every AI backend (ai.ai for
+Gemini, ai.stub for local runs). It wraps whatever `send(prompt) -> str` the
+backend provides.
+"""
+import os
+import time
+import random
+import threading
+from ai.ratelimit import TokenBucket
+
+# Client-side limit, per process: keep AI_RATE_PER_MIN x worker count under the quota
+AI_RATE_PER_MIN = float(os.getenv("AI_RATE_PER_MIN", "15"))
+AI_BURST = int(os.getenv("AI_BURST", "3"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+# Longest a caller waits in the limiter queue before giving up with AIBusy
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "30"))
+
+BUSY_MESSAGE = "AI is temporarily busy. Please try again in a few seconds."
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class AIError(Exception):
+    """The model produced no usable explanation. Never persist anything for it."""
+
+
+class AIBusy(AIError):
+    """Throttled: our own limiter queue is full, or the API kept answering 429."""
+
+
+class AIUnavailable(AIError):
+    """The API failed (5xx, network, bad request) after any retries."""
+
+
+class AIEmptyResponse(AIError):
+    """The API answered but with no text (e.g. a blocked response)."""
+
+
+def _status_code(exc):
+    """
+    The HTTP status a failed call reported, or None. google.api_core
+    exceptions carry it as .code, requests/httpx-style ones as .status_code or
+    .response.status_code. The message text is never searched: "500" in it
+    may just be a token count.
+    """
+    response = getattr(exc, "response", None)
+    for code in (getattr(exc, "code", None), getattr(exc, "status_code", None), getattr(response, "status_code", None)):
+        if isinstance(code, int) and not isinstance(code, bool):
+            return code
+    return None
+
+
+class AIClient:
+    """
+    Wraps one text-generation call with a token-bucket limiter and
+    exponential backoff with full jitter on 429/5xx. Raises AIError
+    subclasses instead of returning error strings, and counts calls,
+    retries and time spent queued in the limiter (see stats()).
+    A falsy rate_per_min turns the limiter off.
+    """
+
+    def __init__(self, send, rate_per_min=AI_RATE_PER_MIN, burst=AI_BURST, max_retries=AI_MAX_RETRIES,
+                 base_delay=1.0, max_delay=20.0, queue_timeout=AI_QUEUE_TIMEOUT, sleep=time.sleep):
+        self.send = send
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst, sleep=sleep) if rate_per_min else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ("calls", "attempts", "retries", "throttled", "failures", "successes", "queue_wait_total", "queue_wait_max"), 0
+        )
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def generate(self, prompt):
+        self._count(calls=1)
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire(timeout=self.queue_timeout) if self.bucket else 0.0
+            if waited is None:
+                self._count(throttled=1, failures=1)
+                raise AIBusy("rate limiter queue full")
+            with self._lock:
+                self._stats["queue_wait_total"] += waited
+                self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], waited)
+                self._stats["attempts"] += 1
+
+            try:
+                text = self.send(prompt)
+            except Exception as e:
+                status = _status_code(e)
+                if status == 429:
+                    self._count(throttled=1)
+                if status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    self._count(failures=1)
+                    error = AIBusy if status == 429 else AIUnavailable
+                    raise error(str(e)) from e
+                self._count(retries=1)
+                self._sleep(self._backoff(attempt))
+                continue
+
+            if not text or not text.strip():
+                self._count(failures=1)
+                raise AIEmptyResponse("empty response")
+            self._count(successes=1)
+            return text
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_wait_avg"] = stats["queue_wait_total"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
@@ -0,0 +1,110 @@
+"""
+Offline pre-warm: generate explanations for every mapping record whose
+definition is missing (or "None") so users never wait on the AI for them.
+
+Results go to the DefinitionStore log in batches, one transaction each, and
+records that already have a logged definition are skipped, so an interrupted
+run picks up where it left off. Fold the results into the workbook/JSON
+afterwards with `python -m mapping.definitions compact`.
+
+Usage:
+    python -m ai.prewarm [--concurrency 4] [--batch-size 20] [--limit N]
+                         [--backend gemini|stub|module:function]
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ai.backends import load_backend
+from mapping.definitions import DB_PATH, DefinitionStore
+from mapping.snapshot import JSON_PATH
+from mapping.store import MappingStore
+
+def missing_definitions(records, definitions):
+    """Records that still need an explanation: [(title, bns_section)], one per BNS section."""
+    todo, seen = [], set()
+    for record in records:
+        if record["definition"] and record["definition"] != "None":
+            continue
+        bns_section = record["bns_section"][0]
+        if bns_section in seen or definitions.lookup(record["bns_section"]):
+            continue
+        seen.add(bns_section)
+        todo.append((record["titles"], bns_section))
+    return todo
+
+
+def prewarm(records, definitions, generate, concurrency=4, batch_size=20, limit=None, log=print):
+    """
+    Generate the missing explanations with at most `concurrency` model calls
+    in flight. Returns (generated, failed) counts.
+    """
+    todo = missing_definitions(records, definitions)
+    if limit is not None:
+        todo = todo[:limit]
+    log(f"{len(todo)} records need an explanation")
+
+    generated = failed = 0
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal generated
+        if batch:
+            definitions.put_many(batch)
+            generated += len(batch)
+            batch.clear()
+            log(f"  {generated}/{len(todo)} saved ({time.perf_counter() - start:.1f}s)")
+
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="prewarm") as executor:
+        futures = {executor.submit(generate, title): (title, bns_section) for title, bns_section in todo}
+        try:
+            for future in as_completed(futures):
+                title, bns_section = futures[future]
+                try:
+                    explanation = future.result()
+                except Exception as e:
+                    explanation, error = None, str(e)
+                else:
+                    error = "empty response"
+                if not explanation:
+                    # Left out of the log, so the next run retries it
+                    failed += 1
+                    log(f"  failed: {bns_section} {title}: {error}")
+                    continue
+                batch.append((bns_section, explanation))
+                if len(batch) >= batch_size:
+                    flush()
+        except KeyboardInterrupt:
+            # Keep what finished; everything else is picked up on the next run
+            for future in futures:
+                future.cancel()
+            flush()
+            raise
+        flush()
+
+    return generated, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate missing AI definitions")
+    parser.add_argument("--json", default=JSON_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--backend", default="gemini", help="gemini, stub, or module:function")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    records = MappingStore(args.json).records
+    definitions = DefinitionStore(args.db)
+    generated, failed = prewarm(
+        records, definitions, load_backend(args.backend),
+        concurrency=args.concurrency, batch_size=args.batch_size, limit=args.limit,
+    )
+    print(f"Generated {generated} definitions, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,39 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter: `rate` tokens per second, bursts of up to
+    `capacity`. acquire() blocks until a token is free (or `timeout` runs out)
+    and returns how long the caller waited. Thread-safe, per process.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a token. Returns the seconds spent waiting, or None (without
+        taking a token) if the wait would exceed `timeout`.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                return None
+            # Reserve the token now so concurrent callers queue up behind us
+            self._tokens -= 1
+        if wait:
+            self._sleep(wait)
+        return wait
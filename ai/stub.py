@@ -0,0 +1,38 @@
+"""
+Local stand-in for ai.explain_legal_term: no network and no API key, just a
+canned explanation after an optional delay (STUB_AI_LATENCY seconds).
+
+Calls go through the same AIClient as the Gemini backend (retries, stats),
+and STUB_AI_429_RATE of them are answered with a 429 the way the API does
+under quota pressure, so load tests see the real retry and "AI Busy"
+behaviour. The client-side limiter is off unless STUB_AI_RPM is set, so
+429s come from STUB_AI_429_RATE alone.
+"""
+import os
+import time
+import random
+from ai.client import AIClient
+
+LATENCY = float(os.getenv("STUB_AI_LATENCY", "0"))
+RATE_LIMITED = float(os.getenv("STUB_AI_429_RATE", "0"))
+# Calls per minute through AIClient's limiter; 0 = unthrottled
+RATE_PER_MIN = float(os.getenv("STUB_AI_RPM", "0"))
+
+
+class StubRateLimited(Exception):
+    code = 429
+
+
+def _send(term):
+    if LATENCY:
+        time.sleep(LATENCY)
+    if RATE_LIMITED and random.random() < RATE_LIMITED:
+        raise StubRateLimited("429 Resource has been exhausted (stub)")
+    return f"{term} is an offence under the Bharatiya Nyaya Sanhita. (stub explanation)"
+
+
+client = AIClient(_send, rate_per_min=RATE_PER_MIN)
+
+
+def explain_legal_term(term: str) -> str:
+    return client.generate(term)
@@ -1,15 +1,79 @@
-from flask import Flask, request, jsonify, render_template
-from mapping.mapping import generate_mapping
+import os
+import time
+import logging
+from flask import Flask, Response, g, request, jsonify, render_template
+from ai.backends import AI_BACKEND, backend_client, load_backend
+from cache.cache import ResponseCache, make_key
+from mapping.definitions import DefinitionStore
+from mapping.snapshot import build_snapshot
+from mapping.store import MappingStore
+from metrics import metrics
+from profiling.profiling import RequestProfiler, install as install_profiler
 from services.autocomplete_service import autocomplete_service
-from services.explain_service import explain_service
+from services.explain_jobs import ExplanationJobs
+from services.explain_service import explain_batch, explain_service
 
 app = Flask(__name__)
 
+# DEBUG shows how each explain query was parsed
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 EXCEL_PATH = "mapping/mapping.xlsx"
 JSON_PATH = "mapping/mapping.json"
+SNAPSHOT_PATH = "mapping/mapping.pkl"
+DEFINITIONS_PATH = os.getenv("DEFINITIONS_PATH", "mapping/definitions.sqlite3")
+
+# Compile Excel into JSON + a prebuilt snapshot; skipped when the workbook is unchanged
+build_snapshot(EXCEL_PATH, JSON_PATH, SNAPSHOT_PATH)
+
+# Loaded once per process (and inherited by workers under `gunicorn --preload`);
+# reloaded only when mapping.json changes on disk
+store = MappingStore(JSON_PATH, SNAPSHOT_PATH)
+store.snapshot()
+
+# AI definitions are appended here instead of rewriting the workbook per request;
+# fold them back with `python -m mapping.definitions compact`
+definitions = DefinitionStore(DEFINITIONS_PATH)
+
+# AI_BACKEND picks Gemini or the local stub (see ai/backends.py)
+ai_client = backend_client(AI_BACKEND)
+
+# Single-flight AI generation, plus the background pool for async explain
+# requests (explanation: pending + job_id)
+AI_WORKERS = int(os.getenv("AI_WORKERS", "4"))
+AI_MAX_PENDING = int(os.getenv("AI_MAX_PENDING", "32"))
+AI_WAIT_TIMEOUT = float(os.getenv("AI_WAIT_TIMEOUT", "60"))
+explain_jobs = ExplanationJobs(
+    definitions, generate=load_backend(AI_BACKEND),
+    max_workers=AI_WORKERS, max_pending=AI_MAX_PENDING, wait_timeout=AI_WAIT_TIMEOUT,
+)
+
+# Most queries one /explain_batch call may carry
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+
+# Response caches; keys include the mapping version, so edits invalidate them
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "600"))
+autocomplete_cache = ResponseCache(CACHE_SIZE, CACHE_TTL)
+explain_cache = ResponseCache(CACHE_SIZE, CACHE_TTL)
+
+@app.before_request
+def start_timing():
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+
+
+@app.after_request
+def finish_timing(response):
+    # Stage spans recorded by the services go back to the browser as
+    # Server-Timing and into the /metrics histograms
+    timings = metrics.finish_request()
+    elapsed = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe_request(route, response.status_code, elapsed, timings)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+    return response
 
-# Generate JSON from Excel at startup
-generate_mapping(EXCEL_PATH, JSON_PATH)
 
 @app.route("/")
 def home():
@@ -24,8 +88,11 @@ def autocomplete():
         return jsonify({"suggestions": []})
 
     try:
-        suggestions = autocomplete_service(query, search_mode, JSON_PATH)
-        return jsonify({"suggestions": suggestions[:10]})
+        key = make_key(store.version, search_mode, query)
+        suggestions = autocomplete_cache.get_or_compute(
+            key, lambda: autocomplete_service(query, search_mode, store, limit=10)
+        )
+        return jsonify({"suggestions": suggestions})
     except Exception as e:
         return jsonify({"suggestions": [], "error": str(e)})
 
@@ -35,15 +102,109 @@ def explain_term():
     query = request.form.get("query", "").strip()
     selected_title = request.form.get("selected_title", "").strip()
     search_mode = request.form.get("search_mode", "ipc").strip()
+    async_mode = request.form.get("async", "").strip().lower() in ("1", "true", "yes")
 
     if not query:
         return jsonify({"error": "Please enter a search term"}), 400
 
     try:
-        result, status_code = explain_service(query, selected_title, search_mode, EXCEL_PATH, JSON_PATH)
+        key = make_key(store.version, search_mode, query, selected_title)
+        with metrics.span("cache"):
+            cached = explain_cache.get(key)
+        if cached is None:
+            cached = explain_service(
+                query, selected_title, search_mode, definitions, store,
+                jobs=explain_jobs, async_mode=async_mode,
+            )
+            # Only cache final answers ("pending" ones change once the job finishes)
+            if cached[1] in (200, 404) and cached[0].get("source") not in ("Pending", "AI Busy"):
+                explain_cache.put(key, cached)
+        result, status_code = cached
         if "error" in result:
             return jsonify(result), status_code
         return jsonify(result),200
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+
+@app.route("/explain_batch", methods=["POST"])
+def explain_batch_term():
+    # JSON body: {"queries": ["302", "420", ...], "search_mode": "ipc", "ai": false}
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    queries = payload.get("queries")
+    search_mode = str(payload.get("search_mode", "ipc")).strip()
+    use_ai = payload.get("ai") in (True, 1, "1", "true", "yes")
+
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": 'Send a JSON body with a non-empty "queries" list'}), 400
+    if len(queries) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} queries per batch"}), 400
+    queries = ["" if query is None else str(query).strip() for query in queries]
+
+    try:
+        resolved = explain_batch(
+            queries, search_mode, definitions, store, jobs=explain_jobs, use_ai=use_ai,
+        )
+    except Exception as e:
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    # One entry per query, in input order; failures don't fail the batch
+    results = []
+    for query, (result, status_code) in zip(queries, resolved):
+        item = {"query": query, "status": status_code}
+        if "error" in result:
+            item["error"] = result["error"]
+        else:
+            item["result"] = result
+        results.append(item)
+    return jsonify({
+        "search_mode": search_mode,
+        "results": results,
+        "errors": sum(1 for item in results if "error" in item),
+    }), 200
+
+
+@app.route("/explain_status/<job_id>", methods=["GET"])
+def explain_status(job_id):
+    status = explain_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(status), 200
+
+
+@app.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "mapping_version": store.version,
+        "autocomplete": autocomplete_cache.stats(),
+        "explain_term": explain_cache.stats(),
+    })
+
+
+@app.route("/ai_stats", methods=["GET"])
+def ai_stats():
+    # Limiter queueing delay, retries and failures for this worker's AI client
+    return jsonify(ai_client.stats() if ai_client else {})
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    # Prometheus text format, for this worker only
+    body = metrics.render(
+        metrics.cache_families({"autocomplete": autocomplete_cache.stats(), "explain_term": explain_cache.stats()}),
+        metrics.ai_families(ai_client.stats() if ai_client else {}),
+    )
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Opt-in profiling (see profiling/profiling.py): off unless PROFILE_ENABLED is
+# set; then requests with "X-Profile: 1", plus PROFILE_SAMPLE_RATE of the rest
+if os.getenv("PROFILE_ENABLED", "").lower() in ("1", "true", "yes"):
+    install_profiler(app, RequestProfiler(
+        directory=os.getenv("PROFILE_DIR", "profiles"),
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        keep=int(os.getenv("PROFILE_KEEP", "200")),
+        output=os.getenv("PROFILE_FORMAT", "pstats"),
+    ))
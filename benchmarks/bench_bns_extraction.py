@@ -0,0 +1,182 @@
+"""
+Benchmark: BNS section page extraction, original vs targeted.
+
+"legacy" is the original path: a full BeautifulSoup tree for the whole page,
+two passes over the paragraphs and uncompiled clean_text regexes. "fast" is
+legal.parse_section_page: a SoupStrainer that only builds the tr.mys-desc row,
+one paragraph pass and precompiled regexes. Runs over the saved-page corpus
+(legal/fixtures.py; rendered in memory unless --corpus points at a written one)
+and checks both produce the same section_dict/section_type for every page.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bns_extraction [--rounds 3] [--corpus DIR]
+"""
+import re
+import sys
+import time
+import argparse
+from bs4 import BeautifulSoup
+from legal.fixtures import read_corpus, render_corpus
+from legal.legal import clean_text, parse_section_page
+
+
+def legacy_clean_text(text):
+    text = re.sub(r'\r', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+    text = re.sub(r'\u2019', "'", text)
+    text = re.sub(r'\u2013', '-', text)
+    text = re.sub(r'\u2014', '--', text)
+    return text.strip()
+
+def legacy_extract_section_content(td, section_num):
+    """The original two-pass extraction, kept for comparison."""
+    section_dict = {}
+    all_parts = []  # For building complete section
+    subsections = {}
+    
+    # REMOVE IPC SECTION REFERENCE PARAGRAPHS
+    for p in td.find_all('p', recursive=False):
+        text = p.get_text(strip=True)
+        if re.match(r'^\s*IPC\s*Section\s*\d+', text, re.I):
+            p.decompose()
+    
+    # Process all paragraph elements
+    for p in td.find_all('p', recursive=False):
+        # Skip IPC/BNS reference paragraphs (double check)
+        text = p.get_text(strip=True)
+        if re.match(r'^\s*(IPC|BNS)\s+Section', text, re.I):
+            continue
+        
+        # Check if this paragraph contains an ordered list (subsections)
+        ol = p.find('ol', recursive=False)
+        if ol:
+            # Get text before the list
+            intro_text = []
+            for child in p.contents:
+                if getattr(child, 'name', None) == 'ol':
+                    break
+                if hasattr(child, 'get_text'):
+                    intro_text.append(child.get_text(" ", strip=True))
+                else:
+                    intro_text.append(str(child).strip())
+            
+            intro = legacy_clean_text(" ".join(filter(None, intro_text)))
+            if intro:
+                all_parts.append(intro)
+            
+            # Extract list items as subsections
+            # Check if it's roman numeral or letter list
+            ol_class = ol.get('class', [])
+            ol_type = ol.get('type', '')
+            is_roman = 'i' in ol_class or ol_type == 'i'
+            
+            lis = ol.find_all('li', recursive=False)
+            for i, li in enumerate(lis, 1):
+                li_text = li.get_text(" ", strip=True)
+                
+                if is_roman:
+                    # Use roman numerals with proper spacing
+                    roman_nums = ['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x']
+                    roman = roman_nums[i-1] if i <= len(roman_nums) else f'#{i}'
+                    subsections[i] = legacy_clean_text(li_text)
+                    all_parts.append(f"({roman}) {subsections[i]}")
+                else:
+                    # Use letters
+                    subsections[i] = legacy_clean_text(li_text)
+                    all_parts.append(f"({chr(96+i)}) {subsections[i]}")
+        else:
+            # Regular paragraph - just add it
+            if text:
+                all_parts.append(legacy_clean_text(text))
+    
+    # If we found subsections, this is a numbered section
+    if subsections:
+        section_type = 'numbered'
+        # Store each subsection separately
+        for i, text in subsections.items():
+            section_dict[f"{section_num}({i})"] = text
+        # Store complete section
+        section_dict[str(section_num)] = "\n\n".join(all_parts)
+    else:
+        # No subsections - check if we have a definitions-style list
+        ol_direct = td.find('ol', recursive=False)
+        if ol_direct:
+            section_type = 'definitions'
+            lis = ol_direct.find_all('li', recursive=False)
+            for i, li in enumerate(lis, 1):
+                li_text = li.get_text(" ", strip=True)
+                section_dict[f"{section_num}({i})"] = legacy_clean_text(li_text)
+            # Join all for complete section
+            section_dict[str(section_num)] = "\n\n".join(
+                [section_dict[f"{section_num}({i})"] for i in range(1, len(lis)+1)]
+            )
+        else:
+            section_type = 'paragraph'
+            section_dict[str(section_num)] = "\n\n".join(all_parts) if all_parts else legacy_clean_text(td.get_text(" ", strip=True))
+    
+    return section_dict, section_type
+
+
+def legacy_parse_section_page(html, section_num):
+    soup = BeautifulSoup(html, 'html.parser')
+    content_row = soup.find('tr', class_='mys-desc')
+    if not content_row:
+        raise ValueError("no mys-desc")
+    td = content_row.find('td')
+    if not td:
+        raise ValueError("no td")
+    return legacy_extract_section_content(td, section_num)
+
+
+def parse_all(parse, pages):
+    results = {}
+    for n, page in pages.items():
+        try:
+            results[n] = parse(page, n)
+        except ValueError as e:
+            results[n] = str(e)
+    return results
+
+
+def timed(func, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--corpus", help="directory written by `python -m legal.fixtures write`")
+    args = parser.parse_args()
+
+    pages = read_corpus(args.corpus) if args.corpus else render_corpus()
+    size = sum(len(page) for page in pages.values())
+    print(f"{len(pages)} pages, {size / len(pages) / 1024:.1f} KB average, best of {args.rounds} rounds\n")
+
+    legacy_results, legacy = timed(lambda: parse_all(legacy_parse_section_page, pages), args.rounds)
+    fast_results, fast = timed(lambda: parse_all(parse_section_page, pages), args.rounds)
+
+    texts = [text for result in legacy_results.values() if isinstance(result, tuple) for text in result[0].values()]
+    _, legacy_clean = timed(lambda: [legacy_clean_text(text) for text in texts], args.rounds)
+    _, fast_clean = timed(lambda: [clean_text(text) for text in texts], args.rounds)
+
+    print(f"{'':<22}{'legacy':>12}{'fast':>12}{'speedup':>10}")
+    print(f"{'parse, ms/page':<22}{legacy / len(pages) * 1e3:>12.2f}{fast / len(pages) * 1e3:>12.2f}{legacy / fast:>9.1f}x")
+    print(f"{'pages/sec':<22}{len(pages) / legacy:>12.0f}{len(pages) / fast:>12.0f}")
+    print(f"{'clean_text, us/call':<22}{legacy_clean / len(texts) * 1e6:>12.2f}{fast_clean / len(texts) * 1e6:>12.2f}"
+          f"{legacy_clean / fast_clean:>9.1f}x")
+
+    mismatches = [n for n in pages if legacy_results[n] != fast_results[n]]
+    if mismatches:
+        print(f"\nMISMATCH on sections {mismatches[:20]}")
+        sys.exit(1)
+    print("\nOutputs identical for every page")
+
+
+if __name__ == "__main__":
+    main()
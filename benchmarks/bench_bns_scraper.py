@@ -0,0 +1,116 @@
+"""
+Benchmark: the BNS scraper end to end, offline.
+
+Serves the saved-page corpus (legal/fixtures.py) from a local fixture server
+in a separate process and measures, against a fresh cache database each time:
+
+  parse       parse_section_page over every page, no network (ms/page)
+  fetch       fetch_sections for all 358 sections (pages/sec)
+  refill      a full workbook fill from an empty cache, read to write (s)
+  refresh     refresh_workbook right after, every page a 304 (s)
+
+and checks the refilled cache matches the entries the corpus was built from.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bns_scraper [--workers 8] [--rate 1000] [--latency 20]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import pandas as pd
+import requests
+from legal import legal
+from legal.fixtures import SECTIONS, load_entries, render_corpus
+
+
+def start_fixture_server(port, latency_ms):
+    # A separate process, so serving pages doesn't compete with the scraper for the GIL
+    process = subprocess.Popen(
+        [sys.executable, "-m", "legal.fixtures", "serve", "--port", str(port), "--latency", str(latency_ms)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    base_url = process.stdout.readline().split(" at ")[-1].strip()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{base_url}?q=1&a=10", timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fixture server did not start")
+
+
+def timed(func):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=legal.MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests/sec per host")
+    parser.add_argument("--latency", type=float, default=20.0, help="server latency per request, ms")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--excel", default=legal.excel_in)
+    args = parser.parse_args()
+
+    pages = render_corpus()
+    _, parse = timed(lambda: [legal.parse_section_page(page, n) for n, page in pages.items() if "mys-desc" in page])
+    parsed_pages = sum(1 for page in pages.values() if "mys-desc" in page)
+
+    server, base_url = start_fixture_server(args.port, args.latency)
+    workdir = tempfile.mkdtemp(prefix="bench_scraper_")
+    try:
+        print(f"Fixture server at {base_url} ({args.latency:.0f} ms latency), "
+              f"{args.workers} workers, {args.rate:.0f} req/s per host\n")
+
+        legal.configure(base_url, os.path.join(workdir, "fetch.sqlite3"), args.workers, args.rate)
+        failed, fetch = timed(lambda: legal.fetch_sections(SECTIONS))
+
+        legal.configure(cache_path=os.path.join(workdir, "refill.sqlite3"))
+        excel_out = os.path.join(workdir, "filled.xlsx")
+
+        def refill():
+            df = pd.read_excel(args.excel, dtype=str)
+            counts = legal.fill_workbook(df)
+            df.to_excel(excel_out, index=False)
+            return counts
+
+        counts, refill_time = timed(refill)
+
+        def refresh():
+            df = pd.read_excel(excel_out, dtype=str)
+            return legal.refresh_workbook(df, os.path.join(workdir, "report.txt"))
+
+        updated, refresh_time = timed(refresh)
+
+        expected = load_entries()
+        mismatched = [n for n, (section_type, entries) in expected.items()
+                      if legal.cache.section_entries(n) != entries or legal.cache.meta(n)["type"] != section_type]
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir)
+
+    fetched = len(SECTIONS) - len(failed)
+    print(f"{'parse':<10}{parse / parsed_pages * 1e3:>10.2f} ms/page   ({parsed_pages} pages)")
+    print(f"{'fetch':<10}{len(SECTIONS) / fetch:>10.1f} pages/s  ({fetched} fetched, {len(failed)} without a section row, {fetch:.2f}s)")
+    print(f"{'refill':<10}{refill_time:>10.2f} s        ({counts['filled']} rows filled, {counts['empty']} empty)")
+    print(f"{'refresh':<10}{refresh_time:>10.2f} s        ({len(updated)} rows changed)")
+
+    if mismatched:
+        print(f"\nMISMATCH: refilled cache differs from the corpus for sections {mismatched[:20]}")
+        sys.exit(1)
+    print(f"\nRefilled cache matches the corpus for all {len(expected)} sections")
+
+
+if __name__ == "__main__":
+    main()
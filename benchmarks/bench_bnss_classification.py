@@ -0,0 +1,175 @@
+"""
+Benchmark: BNSS classification per /explain_term request, before and after
+precomputing it at snapshot build time.
+
+"before" runs the original regex extraction over a record's legal text, as
+every request used to; "after" formats the precomputed bnss_* fields. Also
+reports the one-time extraction cost paid when the snapshot is built, and
+checks that both produce the same output for every record.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bnss_classification [--rounds 20]
+"""
+import re
+import sys
+import time
+import argparse
+from mapping.classification import extract_classification
+from mapping.store import MappingSnapshot
+from services.explain_service import format_bnss_classification
+
+JSON_PATH = "mapping/mapping.json"
+
+
+def legacy_format_bnss_classification(legal_text):
+    """The original per-request implementation (regexes over the legal text), kept for comparison."""
+    if not legal_text or legal_text.strip() == "":
+        return ""
+    
+    # Check if it contains BNSS Classification
+    if "BNSSClassification" not in legal_text:
+        return ""
+    
+    # Extract only the BNSS Classification part
+    bnss_match = re.search(r'BNSSClassification(.+)', legal_text, re.DOTALL | re.IGNORECASE)
+    if not bnss_match:
+        return ""
+    
+    content = bnss_match.group(1).strip()
+    
+    # Initialize result
+    formatted_lines = []
+    
+    # Pattern matching for different components
+    found_items = []
+    
+    # Try to extract ALL punishment lines (for sections with multiple subsections like 64(1), 64(2))
+    # First check if there are numbered subsections like "64(1) -" or "64(2) -"
+    subsection_pattern = r'(\d+\([^\)]+\)\s*-\s*[^.]*?(?:imprisonment|death)[^.]*?(?:fine|\.))(?=\d+\(|Cognizable|Bailable|Triable|Non-|$)'
+    subsection_matches = re.findall(subsection_pattern, content, re.IGNORECASE | re.DOTALL)
+    
+    if subsection_matches:
+        # Found subsection-specific punishments
+        for idx, punishment in enumerate(subsection_matches, 1):
+            punishment = re.sub(r'\s+', ' ', punishment.strip())
+            punishment = punishment.replace('or with death', '**or with death**')
+            # Extract subsection number
+            subsec_match = re.match(r'(\d+\([^\)]+\))', punishment)
+            if subsec_match:
+                subsec_num = subsec_match.group(1)
+                punishment_text = punishment.replace(subsec_num + ' - ', '').strip()
+                found_items.append(f"**Punishment ({subsec_num}):** {punishment_text}")
+            else:
+                found_items.append(f"**Punishment {idx}:** {punishment}")
+    else:
+        # No subsections, look for general punishment
+        imprisonment_patterns = [
+            r'(Rigorous imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)',
+            r'(Simple imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)',
+            r'(Imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)'
+        ]
+        
+        for pattern in imprisonment_patterns:
+            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+            if match:
+                imprisonment_text = match.group(1).strip()
+                # Clean up the text
+                imprisonment_text = re.sub(r'\s+', ' ', imprisonment_text)
+                imprisonment_text = imprisonment_text.replace('or with death', '**or with death**')
+                found_items.append(f"**Punishment:** {imprisonment_text}")
+                break
+    
+    # Extract fine information
+    fine_match = re.search(r'(and (?:shall also be liable to )?fine[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)', content, re.IGNORECASE)
+    if fine_match:
+        fine_text = fine_match.group(1).strip()
+        fine_text = re.sub(r'\s+', ' ', fine_text)
+        if 'fine' not in str(found_items).lower() or 'and fine' not in str(found_items).lower():
+            found_items.append(f"**Fine:** Yes - {fine_text.replace('and ', '').capitalize()}")
+    
+    # Extract Cognizable/Non-cognizable
+    cognizable_match = re.search(r'((?:Non-)?Cognizable)', content, re.IGNORECASE)
+    if cognizable_match:
+        found_items.append(f"**Cognizable:** {cognizable_match.group(1)}")
+    
+    # Extract Bailable/Non-bailable
+    bailable_match = re.search(r'((?:Non-)?[Bb]ailable)', content, re.IGNORECASE)
+    if bailable_match:
+        bail_text = bailable_match.group(1)
+        # Check for conditions
+        condition_match = re.search(r'((?:Non-)?[Bb]ailable[^.]*?(?:on the complaint|only if|only on).*?)(?=Cognizable|Triable|$)', content, re.IGNORECASE | re.DOTALL)
+        if condition_match:
+            bail_text = condition_match.group(1).strip()
+            bail_text = re.sub(r'\s+', ' ', bail_text)
+        found_items.append(f"**Bailable:** {bail_text}")
+    
+    # Extract Triable by information
+    triable_match = re.search(r'(Triable by [^.]+)', content, re.IGNORECASE)
+    if triable_match:
+        triable_text = triable_match.group(1).strip()
+        found_items.append(f"**Triable By:** {triable_text.replace('Triable by ', '')}")
+    
+    # Extract Compoundable information
+    compoundable_match = re.search(r'((?:Non-)?Compoundable[^.]*?)(?=Cognizable|Bailable|Triable|$)', content, re.IGNORECASE | re.DOTALL)
+    if compoundable_match:
+        compoundable_text = compoundable_match.group(1).strip()
+        compoundable_text = re.sub(r'\s+', ' ', compoundable_text)
+        found_items.append(f"**Compoundable:** {compoundable_text}")
+    
+    # If no structured data found, try a simple split approach
+    if not found_items:
+        # Remove the word "BNSSClassification" and split by common patterns
+        lines = re.split(r'(?=[A-Z][a-z]+:)|(?=Cognizable)|(?=Non-cognizable)|(?=Bailable)|(?=Non-bailable)|(?=Triable)', content)
+        for line in lines:
+            line = line.strip()
+            if line and len(line) > 3:
+                found_items.append(f"{line}")
+    
+    # Add all found items to formatted output
+    formatted_lines = found_items
+    
+    return formatted_lines
+
+
+def per_call(func, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) / (rounds * len(items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(JSON_PATH, "rb") as f:
+        snapshot = MappingSnapshot.from_json(f.read())
+    records = snapshot.records
+    classified = [item for item in records if item["bnss_punishment"] is not None]
+
+    mismatches = sum(
+        legacy_format_bnss_classification(item.get("legal", "")) != format_bnss_classification(item)
+        for item in records
+    )
+
+    legal_texts = [item.get("legal", "") for item in records]
+    build = per_call(extract_classification, legal_texts, 1) * len(records)
+    print(f"{len(records)} records, {len(classified)} with a BNSS classification")
+    print(f"one-time extraction at snapshot build: {build * 1e3:.1f} ms\n")
+
+    print(f"{'records':<16}{'before (us)':>13}{'after (us)':>12}{'speedup':>10}")
+    for label, items in (("all", records), ("classified", classified)):
+        before = per_call(lambda item: legacy_format_bnss_classification(item.get("legal", "")), items, args.rounds)
+        after = per_call(format_bnss_classification, items, args.rounds)
+        print(f"{label:<16}{before * 1e6:>13.1f}{after * 1e6:>12.2f}{before / after:>9.0f}x")
+
+    if mismatches:
+        print(f"\nMISMATCH: {mismatches} records format differently")
+        sys.exit(1)
+    print("\nOutputs identical for every record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: vectorized generate_mapping vs the original row-by-row loop.
+
+Builds a synthetic workbook by repeating the rows of mapping/mapping.xlsx
+(with unique section numbers so nothing collapses) plus two unused columns,
+then times read / build / write for both implementations and checks that
+they produce the same records.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_generate_mapping [--rows 100000] [--keep]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import pandas as pd
+from mapping.mapping import read_mapping_frame, build_records, write_mapping_json
+
+SOURCE_WORKBOOK = "mapping/mapping.xlsx"
+
+
+def legacy_generate_mapping(excel_path, json_path):
+    """The original implementation (df.iterrows + per-cell split/strip, indent=4), kept for comparison."""
+    timings = {}
+    start = time.perf_counter()
+    df = pd.read_excel(excel_path)
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = {}
+    status = "Mapped"
+    for _, row in df.iterrows():
+        ipc = [i.strip() for i in str(row["ipc_sec"]).split(",")]
+        ipc_sub = [i_s.strip() for i_s in str(row["ipc_subsec"]).split(",")] if pd.notna(row['ipc_subsec']) else []
+        titles = str(row['title'])
+        bns = [b.strip() for b in str(row["bns"]).split("&")]
+        change = str(row["change"])
+        terms = [t.strip().lower() for t in str(row["term"]).split("/")]
+        definition = str(row["definition"]) if pd.notna(row["definition"]) else None
+        legal = str(row["legal"]) if pd.notna(row["legal"]) else None
+        ipc, ipc_sub, bns, terms = tuple(ipc), tuple(ipc_sub), tuple(bns), tuple(terms)
+        if ipc[0] == "A":
+            status = "Added"
+        elif bns[0] == "R":
+            status = "Removed"
+        result[(ipc, ipc_sub, terms)] = {
+            "bns_section": bns, "titles": titles, "change": change,
+            "status": status, "definition": definition, "legal": legal,
+        }
+    json_ready = [
+        {
+            "ipc_sec": list(k[0]), "ipc_subsec": list(k[1]), "terms": list(k[2]),
+            "bns_section": list(v["bns_section"]),
+            **{key: v[key] for key in v if key != "bns_section"}
+        }
+        for k, v in result.items()
+    ]
+    timings["build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(json_ready, f, indent=4, ensure_ascii=False)
+    timings["write"] = time.perf_counter() - start
+    return json_ready, timings
+
+
+def vectorized_generate_mapping(excel_path, json_path):
+    timings = {}
+    start = time.perf_counter()
+    df = read_mapping_frame(excel_path)
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = build_records(df)
+    timings["build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_mapping_json(records, json_path)
+    timings["write"] = time.perf_counter() - start
+    return records, timings
+
+
+def make_workbook(rows, path):
+    base = pd.read_excel(SOURCE_WORKBOOK)
+    copies = -(-rows // len(base))
+    df = pd.concat([base] * copies, ignore_index=True).iloc[:rows].copy()
+
+    # Make every copy a distinct section so the (ipc, subsec, terms) keys stay unique
+    copy_no = (df.index // len(base)).astype(str)
+    df["ipc_sec"] = df["ipc_sec"].astype(str) + "-" + copy_no
+    df["bns"] = df["bns"].astype(str) + "-" + copy_no
+
+    # Columns generate_mapping never reads
+    df["notes"] = "synthetic row " + df.index.astype(str)
+    df["reviewer"] = "bench"
+    df.to_excel(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic workbook and JSON files")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_mapping_")
+    workbook = os.path.join(workdir, f"mapping_{args.rows}.xlsx")
+
+    print(f"Writing synthetic workbook with {args.rows} rows...")
+    start = time.perf_counter()
+    make_workbook(args.rows, workbook)
+    print(f"  done in {time.perf_counter() - start:.1f}s ({os.path.getsize(workbook) / 1e6:.1f} MB)\n")
+
+    legacy_json = os.path.join(workdir, "legacy.json")
+    fast_json = os.path.join(workdir, "vectorized.json")
+    legacy_records, legacy = legacy_generate_mapping(workbook, legacy_json)
+    fast_records, fast = vectorized_generate_mapping(workbook, fast_json)
+
+    print(f"{'phase':<8}{'legacy (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for phase in ("read", "build", "write"):
+        print(f"{phase:<8}{legacy[phase]:>12.3f}{fast[phase]:>16.3f}{legacy[phase] / fast[phase]:>9.1f}x")
+    total_legacy, total_fast = sum(legacy.values()), sum(fast.values())
+    print(f"{'total':<8}{total_legacy:>12.3f}{total_fast:>16.3f}{total_legacy / total_fast:>9.1f}x")
+    print(f"\nJSON size: {os.path.getsize(legacy_json) / 1e6:.1f} MB -> {os.path.getsize(fast_json) / 1e6:.1f} MB")
+
+    if legacy_records != fast_records:
+        print("MISMATCH: vectorized output differs from the legacy loop")
+        sys.exit(1)
+    print(f"Outputs identical ({len(fast_records)} records)")
+
+    if args.keep:
+        print(f"Files kept in {workdir}")
+    else:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
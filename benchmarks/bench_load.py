@@ -0,0 +1,283 @@
+"""
+Load test: app:app under gunicorn, with the local AI stub instead of Gemini.
+
+Starts gunicorn (--workers / --threads, --preload as in the Procfile) with
+AI_BACKEND=stub, so explanations come from ai/stub.py after --ai-latency ms
+and --ai-429-rate of the stub's calls are answered 429 (retried by AIClient
+like the real API). Definitions go to a fresh SQLite file, so the run starts
+cold: records without a definition in the mapping need the AI once.
+
+Then --users virtual users replay a browser-style trace for --duration
+seconds. Each session types a term or a section number: the autocomplete
+requests are the ones the page sends (2+ characters, after the 300 ms
+debounce), followed by an async explain request for the chosen result and
+/explain_status polls every --poll-ms until the explanation is ready, as
+static/js/script.js does. --pace scales the recorded think time (1 = real
+time, 0 = back to back).
+
+Reports requests/sec, p50/p95/p99 latency and error rate per endpoint,
+plus "ready" (explain request to final explanation). Errors are connection
+failures, 5xx and 429; "AI busy" answers are counted separately.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_load [--workers 2] [--threads 4] [--users 16] [--duration 30]
+                                    [--ai-latency 800] [--ai-429-rate 0.1] [--pace 1]
+                                    [--trace FILE | --write-trace FILE] [--url URL]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+import requests
+from mapping.store import MappingStore
+
+JSON_PATH = "mapping/mapping.json"
+MIN_QUERY_LENGTH = 2   # script.js: no suggestions below 2 characters
+DEBOUNCE_MS = 300      # script.js: suggestions are fetched 300 ms after the last keystroke
+
+
+def _typing(text, rng, typing_ms):
+    """(delay_ms, prefix) for each autocomplete request a browser sends while `text` is typed."""
+    sent, waited = [], 0
+    for i in range(1, len(text) + 1):
+        # Mostly steady typing, with the odd pause long enough to beat the debounce
+        gap = rng.uniform(*typing_ms) if rng.random() > 0.15 else rng.uniform(DEBOUNCE_MS, 900)
+        waited += gap
+        last = i == len(text)
+        if i >= MIN_QUERY_LENGTH and (gap >= DEBOUNCE_MS or last):
+            sent.append((round(waited + (DEBOUNCE_MS if last else 0)), text[:i].strip()))
+            waited = 0
+    return sent
+
+
+def make_trace(records, sessions, seed=1, typing_ms=(60, 220)):
+    """A list of sessions: {"mode", "keys": [[delay_ms, query], ...], "explain": {query, selected_title}}."""
+    rng = random.Random(seed)
+    sectioned = [r for r in records if r["ipc_sec"][0][:1].isdigit() and r["bns_section"][0][:1].isdigit()]
+    trace = []
+    for _ in range(sessions):
+        mode = rng.choice(("ipc", "bns"))
+        if rng.random() < 0.35:
+            # A section number, explained straight from the search box
+            record = rng.choice(sectioned)
+            query = record["ipc_sec"][0] if mode == "ipc" else record["bns_section"][0].replace(" ", "")
+            selected_title = ""
+        else:
+            # A few words of a term, then a pick from the dropdown
+            record = rng.choice(records)
+            words = rng.choice(record["terms"]).split()
+            query = " ".join(words[:rng.randint(1, min(3, len(words)))])
+            selected_title = record["titles"]
+        trace.append({
+            "mode": mode,
+            "keys": _typing(query, rng, typing_ms),
+            "explain": {"query": query, "selected_title": selected_title},
+        })
+    return trace
+
+
+class Results:
+    """Thread-safe samples: kind -> [(latency_s, error)], plus counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(int)
+
+    def add(self, kind, latency, error=False):
+        with self._lock:
+            self.samples[kind].append((latency, error))
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+
+def _request(session, results, kind, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=90, **kwargs)
+    except requests.RequestException:
+        results.add(kind, time.perf_counter() - start, error=True)
+        return None
+    results.add(kind, time.perf_counter() - start, error=response.status_code >= 500 or response.status_code == 429)
+    return response
+
+
+def run_session(http, base_url, item, results, pace, poll_interval, stop_at):
+    for delay_ms, query in item["keys"]:
+        time.sleep(delay_ms / 1000 * pace)
+        _request(http, results, "autocomplete", "POST", f"{base_url}/autocomplete",
+                 data={"query": query, "search_mode": item["mode"]})
+
+    explain = item["explain"]
+    start = time.perf_counter()
+    response = _request(http, results, "explain", "POST", f"{base_url}/explain_term", data={
+        "query": explain["query"], "selected_title": explain["selected_title"],
+        "search_mode": item["mode"], "async": "1",
+    })
+    if response is None or response.status_code != 200:
+        return
+    body = response.json()
+    if body.get("source") == "AI Busy":
+        results.count("ai_busy")
+    job_id = body.get("job_id")
+    # Poll like the page does, giving up after 60 attempts
+    for _ in range(60 if job_id else 0):
+        if time.monotonic() > stop_at + 60:
+            return
+        time.sleep(poll_interval)
+        status = _request(http, results, "explain_status", "GET", f"{base_url}/explain_status/{job_id}")
+        if status is None or status.status_code != 200:
+            continue
+        state = status.json().get("status")
+        if state == "done":
+            break
+        if state == "failed":
+            results.count("ai_failed")
+            results.add("ready", time.perf_counter() - start, error=True)
+            return
+    else:
+        if job_id:
+            results.add("ready", time.perf_counter() - start, error=True)
+            return
+    results.add("ready", time.perf_counter() - start)
+
+
+def replay(base_url, trace, users, duration, pace=1.0, poll_interval=1.0):
+    """Run `users` virtual users over the trace (round robin) for `duration` seconds."""
+    results = Results()
+    position = iter(range(sys.maxsize))
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def user():
+        http = requests.Session()
+        while time.monotonic() < stop_at:
+            with lock:
+                item = trace[next(position) % len(trace)]
+            run_session(http, base_url, item, results, pace, poll_interval, stop_at)
+            results.count("sessions")
+
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def start_gunicorn(port, workers, threads, env):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "--preload",
+         "--workers", str(workers), "--threads", str(threads), "--bind", f"127.0.0.1:{port}",
+         "--log-level", "warning"],
+        env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited:\n{process.stderr.read()}")
+        try:
+            requests.get(f"{base_url}/cache_stats", timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def report(results, elapsed):
+    print(f"{'endpoint':<16}{'requests':>10}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    total = errors = 0
+    for kind in ("autocomplete", "explain", "explain_status", "ready"):
+        samples = results.samples.get(kind)
+        if not samples:
+            continue
+        ordered = sorted(latency for latency, _ in samples)
+        failed = sum(1 for _, error in samples if error)
+        if kind != "ready":
+            total += len(samples)
+            errors += failed
+        print(f"{kind:<16}{len(samples):>10}{len(samples) / elapsed:>9.1f}"
+              + "".join(f"{percentile(ordered, p) * 1e3:>10.1f}" for p in (50, 95, 99))
+              + f"{failed / len(samples):>9.2%}")
+    print(f"\n{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+          f"error rate {errors / max(total, 1):.2%}, {results.counts['sessions']} sessions")
+    print(f"AI busy answers: {results.counts['ai_busy']}, failed AI jobs: {results.counts['ai_failed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=8811)
+    parser.add_argument("--url", help="load an already running server instead of starting gunicorn")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--pace", type=float, default=1.0, help="think time scale: 1 = real time, 0 = none")
+    parser.add_argument("--poll-ms", type=float, default=1000.0, help="explain_status poll interval")
+    parser.add_argument("--ai-latency", type=float, default=800.0, help="stub AI latency, ms")
+    parser.add_argument("--ai-429-rate", type=float, default=0.0, help="share of stub AI calls answered 429")
+    parser.add_argument("--ai-rate-per-min", type=float, default=None, help="STUB_AI_RPM for the server (default: no limit)")
+    parser.add_argument("--sessions", type=int, default=2000, help="sessions in a generated trace")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace", help="replay this trace (JSON) instead of generating one")
+    parser.add_argument("--write-trace", help="write the generated trace to this file and exit")
+    args = parser.parse_args()
+
+    if args.trace:
+        with open(args.trace, encoding="utf-8") as f:
+            trace = json.load(f)
+    else:
+        trace = make_trace(MappingStore(JSON_PATH).records, args.sessions, args.seed)
+    if args.write_trace:
+        with open(args.write_trace, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        print(f"Wrote {len(trace)} sessions to {args.write_trace}")
+        return
+
+    server, workdir = None, None
+    base_url = args.url.rstrip("/") if args.url else None
+    try:
+        if base_url is None:
+            workdir = tempfile.mkdtemp(prefix="bench_load_")
+            env = {
+                "AI_BACKEND": "stub",
+                "STUB_AI_LATENCY": str(args.ai_latency / 1000),
+                "STUB_AI_429_RATE": str(args.ai_429_rate),
+                "DEFINITIONS_PATH": os.path.join(workdir, "definitions.sqlite3"),
+            }
+            if args.ai_rate_per_min is not None:
+                env["STUB_AI_RPM"] = str(args.ai_rate_per_min)
+            server, base_url = start_gunicorn(args.port, args.workers, args.threads, env)
+            print(f"gunicorn app:app at {base_url}: {args.workers} workers x {args.threads} threads, "
+                  f"stub AI {args.ai_latency:.0f} ms, {args.ai_429_rate:.0%} 429s")
+        keys = sum(len(item["keys"]) for item in trace)
+        print(f"{args.users} users for {args.duration:.0f}s at pace {args.pace:g}, "
+              f"trace of {len(trace)} sessions ({keys / len(trace):.1f} autocomplete requests per explain)\n")
+        results, elapsed = replay(base_url, trace, args.users, args.duration, args.pace, args.poll_ms / 1000)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if workdir:
+            shutil.rmtree(workdir)
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
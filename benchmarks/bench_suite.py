@@ -0,0 +1,248 @@
+"""
+Benchmark suite: the request path and the mapping build at 1x-1000x the real data.
+
+A synthetic mapping is generated from the rows of mapping/mapping.xlsx,
+repeated `scale` times with the real schema (ipc_sec, ipc_subsec, bns,
+term, title, definition, legal). Every copy gets its own IPC section numbers
+(302 -> 1302, 2302, ...) and a numbered title; BNS numbers stay inside 1-358
+(explain_service validates that range), so each BNS section is shared by
+`scale` records, as in a larger code.
+
+At each scale it times, per operation:
+
+  parse          parsing.parse with a cold memo cache (cache cleared per call)
+  autocomplete   autocomplete_service over the query mix, both search modes
+  explain        explain_service over the query mix, definitions from SQLite (no AI calls)
+  build          generate_mapping's build_records over the scaled workbook rows
+  snapshot       MappingSnapshot.from_json (classification fields + indexes)
+
+The query mix is drawn from the scaled records: section numbers, subsections,
+term prefixes (keystrokes), infixes from titles, and misses (unknown words,
+out-of-range sections). Each operation reports latency percentiles and the
+peak memory allocated per call (tracemalloc, in a separate pass so tracing
+doesn't skew the timings).
+
+--save writes the results as JSON; --compare reads a saved file and flags
+operations whose p50 got slower by more than --threshold (exit status 1).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite [--scales 1,10,100] [--queries 2000] [--save FILE] [--compare FILE]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import platform
+import tracemalloc
+import pandas as pd
+from parsing import parsing
+from mapping.mapping import read_mapping_frame, build_records, write_mapping_json
+from mapping.store import MappingSnapshot, MappingStore
+from mapping.definitions import DefinitionStore
+from services.autocomplete_service import autocomplete_service
+from services.explain_service import explain_service
+
+SOURCE_WORKBOOK = "mapping/mapping.xlsx"
+
+# Share of each query kind in the mix
+QUERY_MIX = {"section": 0.30, "subsection": 0.15, "prefix": 0.25, "infix": 0.15, "miss": 0.15}
+MISS_WORDS = ["xqzv", "murdre", "blockchain", "qq", "zzz theft", "tort of nuisance"]
+
+_NUMBER = re.compile(r"\d+")
+_SECTION_WITH_SUBSECTION = re.compile(r"^(\d+[A-Z]*)\s*\((\w+)\)$")
+
+
+def scale_frame(base, scale):
+    """`scale` copies of the workbook rows; copy k > 0 has IPC numbers + 1000 * k and a numbered title."""
+    copies = []
+    for k in range(scale):
+        df = base.copy()
+        if k:
+            df["ipc_sec"] = df["ipc_sec"].astype(str).str.replace(
+                _NUMBER, lambda m: str(int(m.group()) + 1000 * k), regex=True
+            )
+            df["title"] = df["title"].astype(str) + f" {k}"
+            df["term"] = df["term"].astype(str).str.replace(r"^([^/]*)", rf"\1 {k}", regex=True)
+        copies.append(df)
+    return pd.concat(copies, ignore_index=True)
+
+
+def make_queries(records, count, rng):
+    """[(search_mode, kind, query)] drawn from the records in QUERY_MIX proportions."""
+    kinds = rng.choices(list(QUERY_MIX), weights=list(QUERY_MIX.values()), k=count)
+    sectioned = [r for r in records if r["ipc_sec"][0][:1].isdigit() and r["bns_section"][0][:1].isdigit()]
+    with_subsection = [
+        r for r in sectioned if r["ipc_subsec"] or any(_SECTION_WITH_SUBSECTION.match(b) for b in r["bns_section"])
+    ]
+    queries = []
+    for kind in kinds:
+        mode = rng.choice(("ipc", "bns"))
+        if kind == "section":
+            record = rng.choice(sectioned)
+            section = record["ipc_sec"][0] if mode == "ipc" else record["bns_section"][0].split("(")[0].strip()
+            query = rng.choice(("{}", "{}", "section {}", mode.upper() + " {}")).format(section)
+        elif kind == "subsection":
+            record = rng.choice(with_subsection)
+            bns = next((m for m in map(_SECTION_WITH_SUBSECTION.match, record["bns_section"]) if m), None)
+            if mode == "bns" and bns:
+                query = rng.choice(("{}({})", "{} ({})", "{} subsection {}")).format(*bns.groups())
+            elif record["ipc_subsec"]:
+                mode = "ipc"
+                query = rng.choice(("{}({})", "{} sub {}")).format(record["ipc_sec"][0], record["ipc_subsec"][0])
+            else:
+                mode = "bns"
+                query = "{}({})".format(*bns.groups())
+        elif kind == "prefix":
+            term = rng.choice(rng.choice(records)["terms"])
+            query = term[:rng.randint(2, 6)]
+        elif kind == "infix":
+            title = rng.choice(records)["titles"].lower()
+            start = rng.randrange(max(1, len(title) - 5))
+            query = title[start:start + rng.randint(3, 5)].strip() or title[:3]
+        else:
+            query = rng.choice(MISS_WORDS + [str(rng.randint(5000, 9999) * 1000), "999", "0"])
+        queries.append((mode, kind, query))
+    return queries
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    at = lambda p: ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    return {
+        "p50": at(50), "p95": at(95), "p99": at(99),
+        "mean": sum(ordered) / len(ordered), "max": ordered[-1], "n": len(ordered),
+    }
+
+
+def measure(func, args_list):
+    """Latency (us) and peak allocation (KiB) per call of func(*args) for each args in args_list."""
+    timings = []
+    for args in args_list:
+        start = time.perf_counter_ns()
+        func(*args)
+        timings.append((time.perf_counter_ns() - start) / 1e3)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in args_list:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func(*args)
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    result = percentiles(timings)
+    result["alloc_kib"] = sum(peaks) / len(peaks)
+    return result
+
+
+def parse_cold(query, mode):
+    parsing._parse_query.cache_clear()
+    return parsing.parse(query, mode)
+
+
+def run_scale(base, scale, query_count, build_repeats, seed, workdir):
+    results = {}
+    df = scale_frame(base, scale)
+    results["build"] = measure(build_records, [(df,)] * build_repeats)
+
+    records = build_records(df)
+    json_path = os.path.join(workdir, f"mapping_{scale}x.json")
+    write_mapping_json(records, json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    results["snapshot"] = measure(MappingSnapshot.from_json, [(raw,)] * build_repeats)
+
+    store = MappingStore(json_path)
+    snapshot = store.snapshot()
+    # Every record gets an explanation up front, so explain never reaches the AI
+    definitions = DefinitionStore(os.path.join(workdir, f"definitions_{scale}x.sqlite3"))
+    definitions.put_many({
+        item["bns_section"][0]: f"Synthetic explanation for {item['titles']}"
+        for item in snapshot.records if not item["definition"]
+    }.items())
+
+    queries = make_queries(snapshot.records, query_count, random.Random(seed))
+    results["parse"] = measure(parse_cold, [(query, mode) for mode, _, query in queries])
+    results["autocomplete"] = measure(autocomplete_service, [(query, mode, store) for mode, _, query in queries])
+    results["explain"] = measure(
+        explain_service, [(query, None, mode, definitions, store) for mode, _, query in queries]
+    )
+    return len(snapshot.records), results
+
+
+def print_results(scale, record_count, results, baseline=None, threshold=0.10):
+    print(f"\n{scale}x ({record_count} records)")
+    header = f"  {'operation':<14}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}{'mean us':>12}{'alloc KiB':>11}"
+    print(header + ("   vs baseline p50" if baseline else ""))
+    regressions = []
+    for name, r in results.items():
+        line = (f"  {name:<14}{r['p50']:>12.1f}{r['p95']:>12.1f}{r['p99']:>12.1f}"
+                f"{r['mean']:>12.1f}{r['alloc_kib']:>11.1f}")
+        old = (baseline or {}).get(name)
+        if old:
+            change = r["p50"] / old["p50"] - 1 if old["p50"] else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            line += f"   {change:+7.1%}{flag}"
+            if flag:
+                regressions.append(f"{scale}x {name}")
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated, e.g. 1,10,100,1000")
+    parser.add_argument("--queries", type=int, default=2000, help="queries per operation and scale")
+    parser.add_argument("--build-repeats", type=int, default=3, help="timed runs of build / snapshot per scale")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --save")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["scales"]
+
+    base = read_mapping_frame(SOURCE_WORKBOOK)
+    print(f"Source: {SOURCE_WORKBOOK} ({len(base)} rows), {args.queries} queries per operation, seed {args.seed}")
+    print("Query mix: " + ", ".join(f"{kind} {share:.0%}" for kind, share in QUERY_MIX.items()))
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    saved = {
+        "python": platform.python_version(), "queries": args.queries,
+        "seed": args.seed, "created": time.strftime("%Y-%m-%d %H:%M:%S"), "scales": {},
+    }
+    regressions = []
+    try:
+        for scale in scales:
+            record_count, results = run_scale(base, scale, args.queries, args.build_repeats, args.seed, workdir)
+            saved["scales"][str(scale)] = results
+            regressions += print_results(
+                scale, record_count, results, (baseline or {}).get(str(scale)), args.threshold
+            )
+    finally:
+        shutil.rmtree(workdir)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    if regressions:
+        print(f"\nREGRESSION (p50 more than {args.threshold:.0%} slower): {', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print(f"\nNo p50 regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Saved-page fixtures for the BNS scraper: devgan.in-style section pages rebuilt
+from the checked-in scrape cache (bns_cache.pkl), so the scraper can be
+exercised and benchmarked without touching the real site.
+
+Each page carries the usual site chrome (head, scripts, section menu, footer)
+around the one tr.mys-desc row legal.py reads, and parses back to the cached
+entries for that section. Sections missing from the cache get a page without
+a section row, like an unknown section on the live site.
+
+The fixture server replays the pages over HTTP the way devgan.in serves them
+(index.php?q=N&a=10), with ETag/Last-Modified validators for conditional
+requests and optional latency and error injection.
+
+Usage:
+    python -m legal.fixtures write [--out DIR]
+    python -m legal.fixtures serve [--port 8800] [--corpus DIR] [--latency MS] [--error-rate P]
+"""
+import os
+import re
+import sys
+import html
+import time
+import pickle
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PICKLE_PATH = os.path.join(BASE_DIR, "bns_cache.pkl")
+CORPUS_DIR = os.path.join(BASE_DIR, "pages")
+SECTIONS = range(1, 359)
+
+_ITEM = re.compile(r'^\((#\d+|[a-z]+)\) ')
+_ROMAN = ['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x']
+
+
+def load_entries(pickle_path=PICKLE_PATH):
+    """{section_num: (section_type, {key: text})} from the old pickle cache."""
+    with open(pickle_path, 'rb') as f:
+        cache = pickle.load(f)
+    sections = {}
+    for key, meta in cache.items():
+        if key.startswith("__meta__"):
+            sections[int(key[len("__meta__"):])] = (
+                meta['type'], {k: cache[k] for k in meta['keys'] if k in cache}
+            )
+    return sections
+
+
+def _label(i, roman):
+    if roman:
+        return _ROMAN[i - 1] if i <= len(_ROMAN) else f'#{i}'
+    return chr(96 + i)
+
+
+def _escape(text):
+    return html.escape(text, quote=False)
+
+
+def _numbered_body(section_num, entries):
+    # Rebuild <p>intro<ol><li>..</li></ol></p> groups from the joined text:
+    # runs of "(a) ..", "(b) .." (or "(i) ..", "(ii) ..") become one list,
+    # attached to the paragraph right before them
+    parts = entries[str(section_num)].split("\n\n")
+    blocks = []
+    i = 0
+    while i < len(parts):
+        match = _ITEM.match(parts[i])
+        if not match or match.group(1) not in ('a', 'i'):
+            blocks.append((parts[i], []))
+            i += 1
+            continue
+        roman = match.group(1) == 'i'
+        items = []
+        while i < len(parts) and parts[i].startswith(f"({_label(len(items) + 1, roman)}) "):
+            items.append(parts[i][len(_label(len(items) + 1, roman)) + 3:])
+            i += 1
+        intro = blocks.pop()[0] if blocks and not blocks[-1][1] else ""
+        blocks.append((intro, (roman, items)))
+    out = []
+    for intro, group in blocks:
+        if not group:
+            out.append(f"<p>{_escape(intro)}</p>")
+            continue
+        roman, items = group
+        ol_class = ' class="i"' if roman else ''
+        lis = "".join(f"<li>{_escape(item)}</li>" for item in items)
+        out.append(f"<p>{_escape(intro)}<ol{ol_class}>{lis}</ol></p>")
+    return "".join(out)
+
+
+def _section_cell(section_num, section_type, entries):
+    # Cross-reference paragraphs the scraper has to skip
+    refs = f"<p>IPC Section {section_num + 20}</p><p>BNS Section {section_num}</p>"
+    if section_type == 'definitions':
+        count = sum(1 for key in entries if key != str(section_num))
+        items = "".join(f"<li>{_escape(entries[f'{section_num}({i})'])}</li>" for i in range(1, count + 1))
+        return f"{refs}<ol>{items}</ol>"
+    if section_type == 'numbered':
+        return refs + _numbered_body(section_num, entries)
+    return refs + "".join(f"<p>{_escape(part)}</p>" for part in entries[str(section_num)].split("\n\n"))
+
+
+def _page(title, rows):
+    menu = "".join(f'<li><a href="index.php?q={n}&amp;a=10">Section {n}</a></li>' for n in SECTIONS)
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f"<title>{_escape(title)} | Bharatiya Nyaya Sanhita</title>"
+        '<link rel="stylesheet" href="/css/site.css"><script src="/js/jquery.min.js"></script>'
+        "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments);}"
+        "gtag('js',new Date());gtag('config','UA-000000-1');</script></head><body>"
+        '<div id="header"><a href="/">devgan.in</a><form action="index.php"><input name="q">'
+        '<input type="hidden" name="a" value="10"><button>Search</button></form></div>'
+        f'<div id="menu"><ul>{menu}</ul></div>'
+        f'<div id="content"><table class="mys-table">{rows}</table></div>'
+        '<div id="footer"><p>Copyright &copy; devgan.in. All rights reserved.</p></div>'
+        "</body></html>"
+    )
+
+
+def render_section_page(section_num, section_type, entries):
+    title = f"Section {section_num}"
+    rows = (
+        f'<tr class="mys-head"><td><h1>{title}</h1></td></tr>'
+        f'<tr class="mys-desc"><td>{_section_cell(section_num, section_type, entries)}</td></tr>'
+        '<tr class="mys-foot"><td><a href="#">Previous</a> | <a href="#">Next</a></td></tr>'
+    )
+    return _page(title, rows)
+
+
+def render_missing_page(section_num):
+    return _page(f"Section {section_num}", '<tr class="mys-head"><td><p>No results found.</p></td></tr>')
+
+
+def render_corpus(pickle_path=PICKLE_PATH):
+    """{section_num: html} for every BNS section, 1-358."""
+    sections = load_entries(pickle_path)
+    return {
+        n: render_section_page(n, *sections[n]) if n in sections else render_missing_page(n)
+        for n in SECTIONS
+    }
+
+
+def write_corpus(out_dir=CORPUS_DIR, pickle_path=PICKLE_PATH):
+    os.makedirs(out_dir, exist_ok=True)
+    pages = render_corpus(pickle_path)
+    for n, page in pages.items():
+        with open(os.path.join(out_dir, f"section_{n}.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+    return len(pages)
+
+
+def read_corpus(corpus_dir=CORPUS_DIR):
+    """{section_num: html} from a directory written by write_corpus()."""
+    pages = {}
+    for name in os.listdir(corpus_dir):
+        match = re.match(r'^section_(\d+)\.html$', name)
+        if match:
+            with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+                pages[int(match.group(1))] = f.read()
+    return pages
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves {section_num: html} at /bns/index.php?q=N&a=10. `latency` seconds
+    are added to every response and `error_rate` of requests get a 503.
+    `faults` ({section_num: [status, ...]}) scripts errors instead: each
+    request for the section is answered with the next status in its list
+    until the list runs out. Error responses carry Retry-After: `retry_after`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages, address=("127.0.0.1", 0), latency=0.0, error_rate=0.0, faults=None, retry_after=0):
+        super().__init__(address, FixtureHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.faults = {n: list(statuses) for n, statuses in (faults or {}).items()}
+        self.retry_after = retry_after
+        self.pages = {}
+        for n, page in pages.items():
+            self.set_page(n, page)
+        self.requests = {"200": 0, "304": 0, "404": 0, "429": 0, "503": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/bns/index.php"
+
+    def set_page(self, section_num, page):
+        """Serve new html for a section (with a fresh ETag and Last-Modified), e.g. to simulate an edit."""
+        body = page.encode("utf-8")
+        self.pages[section_num] = (body, '"%s"' % hashlib.sha1(body).hexdigest(), formatdate(time.time(), usegmt=True))
+
+    def count(self, status):
+        with self._lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+
+    def next_fault(self, section_num):
+        with self._lock:
+            statuses = self.faults.get(section_num)
+            return statuses.pop(0) if statuses else None
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.server.count(str(status))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        retry_after = [("Retry-After", str(self.server.retry_after))]
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            return self._send(503, headers=retry_after)
+        query = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+        fault = self.server.next_fault(int(query)) if query.isdigit() else None
+        if fault:
+            return self._send(fault, headers=retry_after)
+        page = self.server.pages.get(int(query)) if query.isdigit() else None
+        if page is None:
+            return self._send(404)
+        body, etag, last_modified = page
+        validators = [("ETag", etag), ("Last-Modified", last_modified)]
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers=validators)
+        self._send(200, body, [("Content-Type", "text/html; charset=utf-8")] + validators)
+
+
+def start_server(pages=None, port=0, latency=0.0, error_rate=0.0, faults=None, retry_after=0):
+    """Run a FixtureServer on a background thread; returns it (see .base_url, .shutdown())."""
+    server = FixtureServer(render_corpus() if pages is None else pages, ("127.0.0.1", port),
+                           latency, error_rate, faults, retry_after)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Saved BNS section pages: write them out or serve them")
+    parser.add_argument("command", choices=["write", "serve"])
+    parser.add_argument("--out", default=CORPUS_DIR, help="write: output directory")
+    parser.add_argument("--corpus", default=None, help="serve: directory from `write` (default: render from the cache)")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="serve: added latency per request, in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="serve: share of requests answered 503")
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        print(f"Wrote {write_corpus(args.out)} pages to {args.out}")
+        return
+    pages = read_corpus(args.corpus) if args.corpus else render_corpus()
+    server = FixtureServer(pages, ("127.0.0.1", args.port), args.latency / 1000, args.error_rate)
+    print(f"Serving {len(pages)} pages at {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,26 +1,195 @@
+"""
+BNS section scraper: fills the `legal` column of the mapping workbook with
+section text from devgan.in (or any server replaying its pages, see
+legal/fixtures.py).
+
+Importing this module does no work. Use fill_workbook() / refresh_workbook()
+/ fetch_sections() as a library (configure() points them at another site or
+cache), or run it:
+
+    python -m legal.legal [--refresh] [--excel-in X] [--excel-out Y]
+                          [--cache-db Z] [--base-url URL] [--workers N] [--rate R]
+"""
 import re
+import argparse
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from time import sleep
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from time import sleep, monotonic
+import threading
+import difflib
+import hashlib
+import random
 import pickle
+import json
+import time
 import os
+from mapping.connections import ThreadConnections
 
 # === CONFIG ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
 
-excel_in = os.path.join(BASE_DIR, "mapping", "mapping_v1.xlsx")
+excel_in = os.path.join(ROOT_DIR, "mapping", "mapping_v1.xlsx")
 excel_out = os.path.join(BASE_DIR, "mapping_filled_legal_full.xlsx")
+cache_db = os.path.join(BASE_DIR, "bns_cache.sqlite3")
+# Pre-SQLite cache; imported into cache_db once, then left alone
 cache_file = os.path.join(BASE_DIR, "bns_cache.pkl")
-REQUEST_SLEEP = 0.25
+report_file = os.path.join(BASE_DIR, "bns_refresh_report.txt")
 
-# Load cache if exists
-if os.path.exists(cache_file):
-    with open(cache_file, 'rb') as f:
-        cache = pickle.load(f)
-    print(f"Loaded {len(cache)} cached entries")
-else:
-    cache = {}
+# Point BNS_BASE_URL at a local server to scrape saved pages instead of devgan.in
+BASE_URL = os.getenv("BNS_BASE_URL", "https://devgan.in/bns/index.php")
+MAX_WORKERS = int(os.getenv("BNS_WORKERS", "8"))
+REQUESTS_PER_SEC = float(os.getenv("BNS_REQUESTS_PER_SEC", "4"))  # per host
+MAX_RETRIES = 3
+RETRY_STATUS = {429, 500, 502, 503, 504}
+TIMEOUT = 12
+
+def content_hash(section_dict, section_type):
+    payload = json.dumps([section_type, section_dict], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScrapeCache:
+    """
+    Fetched sections in SQLite (WAL mode): one transaction per section, so a
+    crash never leaves a half-written section behind and only new sections
+    are ever written. Safe for several threads or processes scraping at once.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sections (
+        section INTEGER PRIMARY KEY,
+        type TEXT NOT NULL,
+        keys TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        content_hash TEXT,
+        etag TEXT,
+        last_modified TEXT
+    );
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        section INTEGER NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._connections = ThreadConnections(db_path, self._SCHEMA, setup=self._migrate)
+
+    @staticmethod
+    def _migrate(conn):
+        # Databases created before content hashes were tracked
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sections)")}
+        for column in ("content_hash", "etag", "last_modified"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE sections ADD COLUMN {column} TEXT")
+
+    def _connection(self):
+        return self._connections.get()
+
+    def get(self, key, default=None):
+        row = self._connection().execute("SELECT text FROM entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def meta(self, section_num):
+        """{'type': ..., 'keys': [...]} for a fetched section, or None."""
+        row = self._connection().execute(
+            "SELECT type, keys FROM sections WHERE section = ?", (int(section_num),)
+        ).fetchone()
+        return {'type': row[0], 'keys': json.loads(row[1])} if row else None
+
+    def fetched(self):
+        return {row[0] for row in self._connection().execute("SELECT section FROM sections")}
+
+    def section_entries(self, section_num):
+        return dict(self._connection().execute(
+            "SELECT key, text FROM entries WHERE section = ?", (int(section_num),)
+        ).fetchall())
+
+    def validators(self, section_num):
+        """(content_hash, etag, last_modified) stored for a section, or None if never fetched."""
+        row = self._connection().execute(
+            "SELECT type, content_hash, etag, last_modified FROM sections WHERE section = ?", (int(section_num),)
+        ).fetchone()
+        if row is None:
+            return None
+        section_type, stored_hash, etag, last_modified = row
+        if stored_hash is None:
+            # Fetched before hashes were stored (or migrated from the pickle)
+            stored_hash = content_hash(self.section_entries(section_num), section_type)
+        return stored_hash, etag, last_modified
+
+    def put_section(self, section_num, section_dict, section_type, etag=None, last_modified=None):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Replace the whole section: keys that disappeared from the page go too
+            conn.execute("DELETE FROM entries WHERE section = ?", (int(section_num),))
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, section, text) VALUES (?, ?, ?)",
+                [(k, int(section_num), v) for k, v in section_dict.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sections (section, type, keys, fetched_at, content_hash, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (int(section_num), section_type, json.dumps(list(section_dict.keys())), time.time(),
+                 content_hash(section_dict, section_type), etag, last_modified),
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def touch(self, section_num, etag=None, last_modified=None):
+        """Record a fetch that found the section unchanged."""
+        self._connection().execute(
+            "UPDATE sections SET fetched_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+            "WHERE section = ?",
+            (time.time(), etag, last_modified, int(section_num)),
+        )
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def migrate_pickle(self, pickle_path):
+        """One-time import of the old bns_cache.pkl dict. Returns the number of sections imported."""
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_pickle'").fetchone():
+            return 0
+        if not os.path.exists(pickle_path):
+            return 0
+        with open(pickle_path, 'rb') as f:
+            old = pickle.load(f)
+        imported = 0
+        for key, meta in old.items():
+            if not key.startswith("__meta__"):
+                continue
+            section_num = key[len("__meta__"):]
+            section_dict = {k: old[k] for k in meta.get('keys', []) if k in old}
+            if section_dict and self.meta(section_num) is None:
+                self.put_section(section_num, section_dict, meta.get('type', 'paragraph'))
+                imported += 1
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_pickle', ?)",
+            (os.path.abspath(pickle_path),),
+        )
+        return imported
+
+
+# Connects lazily, so importing this module doesn't touch the database
+cache = ScrapeCache(cache_db)
 
 def parse_bns_reference(bns_ref):
     """Parse BNS reference -> list of (section, subsection) tuples."""
@@ -37,13 +206,21 @@ def parse_bns_reference(bns_ref):
             results.append((section, subsection))
     return results if results else None
 
+_MANY_NEWLINES = re.compile(r'\n{3,}')
+_MANY_SPACES = re.compile(r' {2,}')
+_IPC_REFERENCE = re.compile(r'^\s*IPC\s*Section\s*\d+', re.I)
+_SECTION_REFERENCE = re.compile(r'^\s*(IPC|BNS)\s+Section', re.I)
+ROMAN_NUMS = ['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x']
+
 def clean_text(text):
-    text = re.sub(r'\r', ' ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
-    text = re.sub(r'\u2019', "'", text)
-    text = re.sub(r'\u2013', '-', text)
-    text = re.sub(r'\u2014', '--', text)
+    # Plain str.replace for the single characters; the regexes only collapse
+    # whitespace, so running them after the replacements gives the same result
+    text = text.replace('\r', ' ').replace('\u2019', "'").replace('\u2013', '-').replace('\u2014', '--')
+    # Substring checks are much cheaper than a regex scan that finds nothing
+    if '\n\n\n' in text:
+        text = _MANY_NEWLINES.sub('\n\n', text)
+    if '  ' in text:
+        text = _MANY_SPACES.sub(' ', text)
     return text.strip()
 
 def extract_section_content(td, section_num):
@@ -55,17 +232,15 @@ def extract_section_content(td, section_num):
     all_parts = []  # For building complete section
     subsections = {}
     
-    # REMOVE IPC SECTION REFERENCE PARAGRAPHS
+    # Process all paragraph elements in one pass
     for p in td.find_all('p', recursive=False):
         text = p.get_text(strip=True)
-        if re.match(r'^\s*IPC\s*Section\s*\d+', text, re.I):
+        # REMOVE IPC SECTION REFERENCE PARAGRAPHS (also from the td text fallback below)
+        if _IPC_REFERENCE.match(text):
             p.decompose()
-    
-    # Process all paragraph elements
-    for p in td.find_all('p', recursive=False):
-        # Skip IPC/BNS reference paragraphs (double check)
-        text = p.get_text(strip=True)
-        if re.match(r'^\s*(IPC|BNS)\s+Section', text, re.I):
+            continue
+        # Skip IPC/BNS reference paragraphs
+        if _SECTION_REFERENCE.match(text):
             continue
         
         # Check if this paragraph contains an ordered list (subsections)
@@ -97,8 +272,7 @@ def extract_section_content(td, section_num):
                 
                 if is_roman:
                     # Use roman numerals with proper spacing
-                    roman_nums = ['i', 'ii', 'iii', 'iv', 'v', 'vi', 'vii', 'viii', 'ix', 'x']
-                    roman = roman_nums[i-1] if i <= len(roman_nums) else f'#{i}'
+                    roman = ROMAN_NUMS[i-1] if i <= len(ROMAN_NUMS) else f'#{i}'
                     subsections[i] = clean_text(li_text)
                     all_parts.append(f"({roman}) {subsections[i]}")
                 else:
@@ -168,107 +342,398 @@ def _print_success_message(key, section_type):
         else:
             print(f"[FETCH] {key}... OK [section filled successfully]")
 
+class HostRateLimiter:
+    """Token bucket per host: `rate` requests per second, bursts of `burst`."""
+
+    def __init__(self, rate=REQUESTS_PER_SEC, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # host -> (tokens, last refill)
+
+    def acquire(self, host):
+        with self._lock:
+            now = monotonic()
+            tokens, updated = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+            self._buckets[host] = (tokens, now)
+        # A negative balance is our place in the queue for this host
+        if tokens < 0:
+            sleep(-tokens / self.rate)
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """One keep-alive connection pool shared by every worker thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+session = make_session()
+limiter = HostRateLimiter()
+
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return random.uniform(0, 0.5 * 2 ** attempt)
+
+
+def configure(base_url=None, cache_path=None, workers=None, rate=None):
+    """
+    Point the scraper at another site or cache database, or change its
+    concurrency and per-host rate. Call before fetching.
+    """
+    global BASE_URL, MAX_WORKERS, REQUESTS_PER_SEC, cache, session, limiter
+    if base_url:
+        BASE_URL = base_url
+    if cache_path:
+        cache = ScrapeCache(cache_path)
+    if workers:
+        MAX_WORKERS = workers
+        session = make_session(workers)
+    if rate:
+        REQUESTS_PER_SEC = rate
+        limiter = HostRateLimiter(rate)
+
+
+def fetch_page(url, headers=None, retries=MAX_RETRIES):
+    """
+    GET a page, retrying 429/5xx and connection errors with jittered backoff.
+    Returns the response; 304 Not Modified counts as success.
+    """
+    host = urlsplit(url).netloc
+    for attempt in range(retries + 1):
+        limiter.acquire(host)
+        try:
+            response = session.get(url, headers=headers, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            sleep(_retry_delay(None, attempt))
+            continue
+        if response.status_code in RETRY_STATUS and attempt < retries:
+            sleep(_retry_delay(response, attempt))
+            continue
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+
+def fetch_html(url, retries=MAX_RETRIES):
+    return fetch_page(url, retries=retries).text
+
+
+def section_url(section_num):
+    return f"{BASE_URL}?q={section_num}&a=10"
+
+
+# Only the section row gets turned into a tree; the rest of the page is skipped
+_SECTION_ROW = SoupStrainer('tr', class_='mys-desc')
+
+def parse_section_page(html, section_num):
+    """Parse one devgan.in section page -> (section_dict, section_type)."""
+    soup = BeautifulSoup(html, 'html.parser', parse_only=_SECTION_ROW)
+    content_row = soup.find('tr', class_='mys-desc')
+    if not content_row:
+        raise ValueError("no mys-desc")
+    td = content_row.find('td')
+    if not td:
+        raise ValueError("no td")
+    return extract_section_content(td, section_num)
+
+
+def _fetch_parse_store(section_num):
+    response = fetch_page(section_url(section_num))
+    section_dict, section_type = parse_section_page(response.text, section_num)
+    cache.put_section(
+        section_num, section_dict, section_type,
+        response.headers.get("ETag"), response.headers.get("Last-Modified"),
+    )
+    return section_dict, section_type
+
+
+def _print_section(section_num, section_dict, section_type):
+    for k in _sort_keys_for_printing(list(section_dict.keys()), section_num):
+        _print_success_message(k, section_type)
+
+
+def fetch_sections(section_nums, workers=None):
+    """
+    Fetch every section not cached yet on a bounded pool of worker threads.
+    Each worker downloads, parses and commits its section, so an interrupted
+    run resumes from the sections still missing. Returns the sections that failed.
+    """
+    workers = workers or MAX_WORKERS
+    fetched = cache.fetched()
+    todo = sorted({n for n in section_nums if n not in fetched})
+    failed = []
+    if not todo:
+        return failed
+    print(f"Fetching {len(todo)} sections with {workers} workers...")
+    with ThreadPoolExecutor(workers, thread_name_prefix="bns") as executor:
+        futures = {executor.submit(_fetch_parse_store, n): n for n in todo}
+        for future in as_completed(futures):
+            section_num = futures[future]
+            try:
+                section_dict, section_type = future.result()
+            except Exception as e:
+                print(f" [FETCH] {section_num}... ERROR: {e}")
+                failed.append(section_num)
+                continue
+            _print_section(section_num, section_dict, section_type)
+    return failed
+
+
+def _refresh_section(section_num):
+    """
+    Re-fetch one section, conditionally when we have validators for it.
+    Returns (status, old_entries, new_entries) with status one of
+    'not-modified', 'unchanged', 'changed' or 'new'.
+    """
+    validators = cache.validators(section_num)
+    headers = {}
+    if validators:
+        _, etag, last_modified = validators
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = fetch_page(section_url(section_num), headers)
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    if response.status_code == 304:
+        cache.touch(section_num, etag, last_modified)
+        return 'not-modified', None, None
+
+    section_dict, section_type = parse_section_page(response.text, section_num)
+    if validators and validators[0] == content_hash(section_dict, section_type):
+        cache.touch(section_num, etag, last_modified)
+        return 'unchanged', None, None
+
+    old_entries = cache.section_entries(section_num)
+    cache.put_section(section_num, section_dict, section_type, etag, last_modified)
+    return ('changed' if validators else 'new'), old_entries, section_dict
+
+
+def refresh_sections(section_nums, workers=None):
+    """
+    Re-check each unique section once, on the worker pool. Returns
+    ({status: [section, ...]}, {section: (old_entries, new_entries)}) for the
+    sections whose text changed or that are new.
+    """
+    workers = workers or MAX_WORKERS
+    todo = sorted(set(section_nums))
+    print(f"Refreshing {len(todo)} sections with {workers} workers...")
+    outcome = {'not-modified': [], 'unchanged': [], 'changed': [], 'new': [], 'failed': []}
+    changes = {}
+    with ThreadPoolExecutor(workers, thread_name_prefix="bns") as executor:
+        futures = {executor.submit(_refresh_section, n): n for n in todo}
+        for future in as_completed(futures):
+            section_num = futures[future]
+            try:
+                status, old_entries, new_entries = future.result()
+            except Exception as e:
+                print(f" [REFRESH] {section_num}... ERROR: {e}")
+                outcome['failed'].append(section_num)
+                continue
+            outcome[status].append(section_num)
+            if new_entries is not None:
+                print(f" [REFRESH] {section_num}... {status.upper()}")
+                changes[section_num] = (old_entries, new_entries)
+    for sections in outcome.values():
+        sections.sort()
+    return outcome, changes
+
+
+def write_change_report(path, outcome, changes, updated_rows):
+    """Plain-text report: counts, the rows rewritten, and a unified diff per changed key."""
+    lines = [f"BNS refresh report ({time.strftime('%Y-%m-%d %H:%M:%S')})", ""]
+    for status, sections in outcome.items():
+        lines.append(f"{status:>13}: {len(sections)}" + (f"  {sections}" if status == 'failed' and sections else ""))
+    lines.append(f"{'rows updated':>13}: {len(updated_rows)}")
+    lines.append("")
+    for row_no, bns_ref in updated_rows:
+        lines.append(f"Row {row_no}: {bns_ref}")
+    for section_num in sorted(changes):
+        old_entries, new_entries = changes[section_num]
+        lines += ["", f"=== Section {section_num} ==="]
+        for key in sorted(set(old_entries) | set(new_entries)):
+            old_text, new_text = old_entries.get(key), new_entries.get(key)
+            if old_text == new_text:
+                continue
+            if old_text is None:
+                lines.append(f"+ {key} (added)")
+            elif new_text is None:
+                lines.append(f"- {key} (removed)")
+            lines.extend(difflib.unified_diff(
+                (old_text or "").splitlines(), (new_text or "").splitlines(),
+                fromfile=f"{key} (before)", tofile=f"{key} (after)", lineterm="",
+            ))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def refresh_workbook(df, report_path=report_file):
+    """
+    Incremental mode: re-check every section the sheet references once and
+    rewrite the legal column only for rows whose section changed.
+    """
+    row_refs = []
+    for idx, bns_ref in df['bns'].items():
+        parsed = parse_bns_reference(str(bns_ref).strip()) if pd.notna(bns_ref) else None
+        if parsed:
+            row_refs.append((idx, str(bns_ref).strip(), parsed[0]))
+
+    outcome, changes = refresh_sections(section for _, _, (section, _) in row_refs)
+
+    updated_rows = []
+    for idx, bns_ref, (section, subsection) in row_refs:
+        if section not in changes:
+            continue
+        key = f"{section}" if subsection is None else f"{section}({subsection})"
+        legal_text = changes[section][1].get(key)
+        if legal_text != df.at[idx, 'legal']:
+            df.at[idx, 'legal'] = legal_text
+            updated_rows.append((idx + 1, bns_ref))
+
+    write_change_report(report_path, outcome, changes, updated_rows)
+    print("\n=== REFRESH SUMMARY ===")
+    for status, sections in outcome.items():
+        print(f"{status.capitalize()}: {len(sections)}")
+    print(f"Rows updated: {len(updated_rows)}")
+    print(f"Report: {report_path}")
+    return updated_rows
+
+
 def fetch_bns_section(section_num, subsection_num=None):
     """Fetch BNS section with proper subsection handling."""
     requested_key = f"{section_num}" if subsection_num is None else f"{section_num}({subsection_num})"
+    meta = cache.meta(section_num)
     
     # Check cache
-    if requested_key in cache:
+    cached = cache.get(requested_key)
+    if cached is not None:
         print(f" [CACHE] {requested_key}")
-        meta = cache.get(f"__meta__{section_num}")
         section_type = meta['type'] if meta and 'type' in meta else None
         if section_type:
             _print_success_message(requested_key, section_type)
-        return cache[requested_key]
+        return cached
+    if meta:
+        # Section already fetched; this subsection just isn't on the page
+        print(f" [CACHE] {requested_key}... not found in section {section_num}")
+        return None
     
     # Fetch from web
-    url = f"https://devgan.in/bns/index.php?q={section_num}&a=10"
     try:
-        print(f" [FETCH] {requested_key}...", end='')
-        response = requests.get(url, timeout=12)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        content_row = soup.find('tr', class_='mys-desc')
-        if not content_row:
-            print(" FAILED - no mys-desc")
-            return None
-        td = content_row.find('td')
-        if not td:
-            print(" FAILED - no td")
-            return None
-        
-        section_dict, section_type = extract_section_content(td, section_num)
-        
-        # Cache all parts
-        for k, v in section_dict.items():
-            cache[k] = v
-        cache[f"__meta__{section_num}"] = {'type': section_type, 'keys': list(section_dict.keys())}
-        
-        # Print success
-        ordered_keys = _sort_keys_for_printing(list(section_dict.keys()), section_num)
-        for k in ordered_keys:
-            _print_success_message(k, section_type)
-            sleep(0.02)
-        
-        sleep(REQUEST_SLEEP)
-        
-        return cache.get(requested_key)
+        print(f" [FETCH] {requested_key}...")
+        section_dict, section_type = _fetch_parse_store(section_num)
+        _print_section(section_num, section_dict, section_type)
+        return section_dict.get(requested_key)
         
     except Exception as e:
         print(f" ERROR: {e}")
         return None
 
-# === LOAD EXCEL ===
-df = pd.read_excel(excel_in, dtype=str)
+def fill_workbook(df):
+    """
+    Full run: fetch every section the sheet references (concurrently, skipping
+    cached ones) and fill the legal column row by row. Returns the row counts.
+    """
+    if 'legal' not in df.columns:
+        df['legal'] = ''
 
-if 'legal' not in df.columns:
-    df['legal'] = ''
+    # === PROCESS EACH ROW ===
+    filled_count = 0
+    empty_count = 0
+    invalid_count = 0
 
-# === PROCESS EACH ROW ===
-filled_count = 0
-empty_count = 0
-invalid_count = 0
+    # Download every section the sheet needs up front, concurrently
+    needed = []
+    for bns_ref in df['bns'].dropna():
+        parsed = parse_bns_reference(str(bns_ref).strip())
+        if parsed:
+            needed.append(parsed[0][0])
+    fetch_sections(needed)
 
-print("\nProcessing rows...")
+    print("\nProcessing rows...")
 
-for idx, row in df.iterrows():
-    bns_ref = str(row.get('bns', '')).strip()
+    for idx, row in df.iterrows():
+        bns_ref = str(row.get('bns', '')).strip()
     
-    if not bns_ref or bns_ref.upper() == 'R':
-        df.at[idx, 'legal'] = None
-        continue
+        if not bns_ref or bns_ref.upper() == 'R':
+            df.at[idx, 'legal'] = None
+            continue
     
-    parsed = parse_bns_reference(bns_ref)
-    if not parsed:
-        print(f"Row {idx+1}: Invalid format '{bns_ref}'")
-        invalid_count += 1
-        continue
+        parsed = parse_bns_reference(bns_ref)
+        if not parsed:
+            print(f"Row {idx+1}: Invalid format '{bns_ref}'")
+            invalid_count += 1
+            continue
     
-    section, subsection = parsed[0]
-    legal_text = fetch_bns_section(section, subsection)
+        section, subsection = parsed[0]
+        legal_text = fetch_bns_section(section, subsection)
     
-    if legal_text:
-        df.at[idx, 'legal'] = legal_text
-        filled_count += 1
-    else:
-        df.at[idx, 'legal'] = None
-        empty_count += 1
+        if legal_text:
+            df.at[idx, 'legal'] = legal_text
+            filled_count += 1
+        else:
+            df.at[idx, 'legal'] = None
+            empty_count += 1
     
-    if (idx + 1) % 10 == 0:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(cache, f)
-        print(f"Progress: {idx+1} rows processed")
-
-# === FINAL SAVE ===
-df.to_excel(excel_out, index=False)
-
-with open(cache_file, 'wb') as f:
-    pickle.dump(cache, f)
-
-print(f"\n=== SUMMARY ===")
-print(f"Rows filled: {filled_count}")
-print(f"Rows empty: {empty_count}")
-print(f"Invalid format: {invalid_count}")
-print(f"Cache entries: {len(cache)}")
-print(f"Saved to: {excel_out}")
\ No newline at end of file
+        if (idx + 1) % 10 == 0:
+            print(f"Progress: {idx+1} rows processed")
+
+    return {'filled': filled_count, 'empty': empty_count, 'invalid': invalid_count}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the legal column of the mapping workbook from devgan.in")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-check cached sections and update only the rows whose text changed")
+    parser.add_argument("--excel-in", default=excel_in)
+    parser.add_argument("--excel-out", default=excel_out)
+    parser.add_argument("--cache-db", default=cache_db)
+    parser.add_argument("--report", default=report_file, help="change report written by --refresh")
+    parser.add_argument("--base-url", default=None, help=f"section page URL (default {BASE_URL})")
+    parser.add_argument("--workers", type=int, default=None, help=f"concurrent fetches (default {MAX_WORKERS})")
+    parser.add_argument("--rate", type=float, default=None, help=f"requests/sec per host (default {REQUESTS_PER_SEC})")
+    args = parser.parse_args(argv)
+
+    configure(args.base_url, args.cache_db, args.workers, args.rate)
+    migrated = cache.migrate_pickle(cache_file)
+    if migrated:
+        print(f"Migrated {migrated} sections from {cache_file}")
+    print(f"Loaded {len(cache)} cached entries")
+
+    # === REFRESH MODE ===
+    if args.refresh:
+        df = pd.read_excel(args.excel_out if os.path.exists(args.excel_out) else args.excel_in, dtype=str)
+        if 'legal' not in df.columns:
+            df['legal'] = None
+        updated_rows = refresh_workbook(df, args.report)
+        if updated_rows:
+            df.to_excel(args.excel_out, index=False)
+            print(f"Saved to: {args.excel_out}")
+        return {'updated': len(updated_rows)}
+
+    # === LOAD EXCEL ===
+    df = pd.read_excel(args.excel_in, dtype=str)
+    counts = fill_workbook(df)
+
+    # === FINAL SAVE ===
+    df.to_excel(args.excel_out, index=False)
+
+    print(f"\n=== SUMMARY ===")
+    print(f"Rows filled: {counts['filled']}")
+    print(f"Rows empty: {counts['empty']}")
+    print(f"Invalid format: {counts['invalid']}")
+    print(f"Cache entries: {len(cache)}")
+    print(f"Saved to: {args.excel_out}")
+    return counts
+
+if __name__ == "__main__":
+    main()
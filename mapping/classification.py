@@ -0,0 +1,114 @@
+"""
+BNSS classification extracted from a record's `legal` text: punishment, fine,
+cognizable, bailable, triable by and compoundable.
+
+This runs once per record when the mapping snapshot is built (see
+MappingSnapshot.from_json) and the results are stored as flat bnss_* fields on
+the record, so requests only read them.
+"""
+import re
+
+CLASSIFICATION_FIELDS = (
+    "bnss_punishment",    # ((subsection or None, text), ...); None if the record has no classification
+    "bnss_fine",
+    "bnss_cognizable",
+    "bnss_bailable",
+    "bnss_triable",
+    "bnss_compoundable",
+    "bnss_notes",         # raw lines, only when none of the above could be found
+)
+
+_CLASSIFICATION = re.compile(r'BNSSClassification(.+)', re.DOTALL | re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+# Numbered subsections like "64(1) - ..." each carry their own punishment
+_SUBSECTION_PUNISHMENT = re.compile(
+    r'(\d+\([^\)]+\)\s*-\s*[^.]*?(?:imprisonment|death)[^.]*?(?:fine|\.))(?=\d+\(|Cognizable|Bailable|Triable|Non-|$)',
+    re.IGNORECASE | re.DOTALL,
+)
+_SUBSECTION_NUMBER = re.compile(r'(\d+\([^\)]+\))')
+_IMPRISONMENT = [
+    re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    for pattern in (
+        r'(Rigorous imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)',
+        r'(Simple imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)',
+        r'(Imprisonment[^.]*?(?:years?|life)[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)',
+    )
+]
+_FINE = re.compile(r'(and (?:shall also be liable to )?fine[^.]*?)(?=Cognizable|Bailable|Triable|Non-|$)', re.IGNORECASE)
+_COGNIZABLE = re.compile(r'((?:Non-)?Cognizable)', re.IGNORECASE)
+_BAILABLE = re.compile(r'((?:Non-)?[Bb]ailable)', re.IGNORECASE)
+_BAILABLE_CONDITION = re.compile(
+    r'((?:Non-)?[Bb]ailable[^.]*?(?:on the complaint|only if|only on).*?)(?=Cognizable|Triable|$)',
+    re.IGNORECASE | re.DOTALL,
+)
+_TRIABLE = re.compile(r'(Triable by [^.]+)', re.IGNORECASE)
+_COMPOUNDABLE = re.compile(r'((?:Non-)?Compoundable[^.]*?)(?=Cognizable|Bailable|Triable|$)', re.IGNORECASE | re.DOTALL)
+_NOTE_SPLIT = re.compile(r'(?=[A-Z][a-z]+:)|(?=Cognizable)|(?=Non-cognizable)|(?=Bailable)|(?=Non-bailable)|(?=Triable)')
+
+
+def _squash(text):
+    return _WHITESPACE.sub(' ', text.strip())
+
+
+def extract_classification(legal_text):
+    """
+    Structured BNSS classification for one record's legal text, as a dict
+    keyed by CLASSIFICATION_FIELDS. Every field is None if the text has no
+    BNSS classification.
+    """
+    fields = dict.fromkeys(CLASSIFICATION_FIELDS)
+    if not legal_text or not legal_text.strip() or "BNSSClassification" not in legal_text:
+        return fields
+    bnss_match = _CLASSIFICATION.search(legal_text)
+    if not bnss_match:
+        return fields
+
+    content = bnss_match.group(1).strip()
+    punishment = []
+
+    subsection_matches = _SUBSECTION_PUNISHMENT.findall(content)
+    if subsection_matches:
+        for text in subsection_matches:
+            text = _squash(text).replace('or with death', '**or with death**')
+            subsection = _SUBSECTION_NUMBER.match(text).group(1)
+            punishment.append((subsection, text.replace(subsection + ' - ', '').strip()))
+    else:
+        for pattern in _IMPRISONMENT:
+            match = pattern.search(content)
+            if match:
+                punishment.append((None, _squash(match.group(1)).replace('or with death', '**or with death**')))
+                break
+    fields["bnss_punishment"] = tuple(punishment)
+
+    fine_match = _FINE.search(content)
+    # Skip it when a punishment line already spells out "and fine"
+    if fine_match and not any('and fine' in text.lower() for _, text in punishment):
+        fields["bnss_fine"] = _squash(fine_match.group(1)).replace('and ', '').capitalize()
+
+    cognizable_match = _COGNIZABLE.search(content)
+    if cognizable_match:
+        fields["bnss_cognizable"] = cognizable_match.group(1)
+
+    bailable_match = _BAILABLE.search(content)
+    if bailable_match:
+        condition_match = _BAILABLE_CONDITION.search(content)
+        fields["bnss_bailable"] = _squash(condition_match.group(1)) if condition_match else bailable_match.group(1)
+
+    triable_match = _TRIABLE.search(content)
+    if triable_match:
+        fields["bnss_triable"] = triable_match.group(1).strip().replace('Triable by ', '')
+
+    compoundable_match = _COMPOUNDABLE.search(content)
+    if compoundable_match:
+        fields["bnss_compoundable"] = _squash(compoundable_match.group(1))
+
+    found = punishment or any(fields[name] is not None for name in CLASSIFICATION_FIELDS[1:6])
+    notes = []
+    if not found:
+        # Nothing structured; fall back to splitting on the usual headings
+        for line in _NOTE_SPLIT.split(content):
+            line = line.strip()
+            if line and len(line) > 3:
+                notes.append(line)
+    fields["bnss_notes"] = tuple(notes)
+    return fields
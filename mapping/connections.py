@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """
+    Per-thread SQLite connections to one database file, in WAL mode and
+    autocommit (callers issue BEGIN themselves for multi-statement writes).
+
+    Each thread gets its own connection on first use, and a connection is
+    never reused across a fork (gunicorn --preload): the child opens a fresh
+    one. `schema` runs on every new connection, then `setup(conn)` if given
+    (e.g. to add columns to databases created by older versions).
+    """
+
+    def __init__(self, db_path, schema, setup=None, timeout=30):
+        self.db_path = db_path
+        self.schema = schema
+        self.setup = setup
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            if self.setup:
+                self.setup(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,229 @@
+"""
+Write-behind store for AI-generated definitions.
+
+Requests append new definitions to a SQLite log (WAL mode, safe across
+gunicorn workers) instead of rewriting mapping.xlsx and mapping.json inline.
+Reads overlay the log on top of the mapping. compact() folds pending entries
+back into the workbook and JSON in batches, offline:
+
+    python -m mapping.definitions compact [--batch-size N]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import pandas as pd
+from mapping.mapping import write_mapping_json
+from mapping.connections import ThreadConnections
+from mapping.snapshot import SNAPSHOT_PATH, build_snapshot, mapping_lock
+
+DB_PATH = "mapping/definitions.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS definitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bns_section TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS definitions_by_section ON definitions (bns_section, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    bns_section TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class DefinitionStore:
+    """
+    Append-only log of (bns_section, definition). An entry applies to every
+    mapping row whose BNS sections include it, and the newest entry wins.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._connections = ThreadConnections(db_path, _SCHEMA)
+
+    def _connection(self):
+        return self._connections.get()
+
+    def put(self, bns_section, definition):
+        self._connection().execute(
+            "INSERT INTO definitions (bns_section, definition, created_at) VALUES (?, ?, ?)",
+            (bns_section, definition, time.time()),
+        )
+
+    def put_many(self, entries):
+        """Append [(bns_section, definition)] in one transaction."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO definitions (bns_section, definition, created_at) VALUES (?, ?, ?)",
+                [(bns_section, definition, now) for bns_section, definition in entries],
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def lookup(self, bns_sections):
+        """Newest definition recorded for any of the given BNS sections, or None."""
+        bns_sections = list(bns_sections)
+        if not bns_sections:
+            return None
+        placeholders = ", ".join("?" * len(bns_sections))
+        row = self._connection().execute(
+            f"SELECT definition FROM definitions WHERE bns_section IN ({placeholders}) ORDER BY id DESC LIMIT 1",
+            bns_sections,
+        ).fetchone()
+        return row[0] if row else None
+
+    # Background generation jobs live in the same database so that any worker
+    # can answer a status poll, whichever worker ran the job.
+
+    def claim_job(self, job_id, title, bns_section, stale_after=300):
+        """
+        Mark a job as pending. Returns True if the caller now owns it and
+        should run it; False if it is already done, or already pending and
+        updated within `stale_after` seconds (another caller owns it). Failed
+        and stale jobs can be claimed again.
+        """
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO jobs (id, title, bns_section, status, updated_at) VALUES (?, ?, ?, 'pending', ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = 'pending', result = NULL, error = NULL, updated_at = excluded.updated_at "
+            "WHERE jobs.status = 'failed' OR (jobs.status = 'pending' AND jobs.updated_at < ?)",
+            (job_id, title, bns_section, now, now - stale_after),
+        )
+        return cursor.rowcount == 1
+
+    def finish_job(self, job_id, result):
+        self._connection().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (result, time.time(), job_id),
+        )
+
+    def touch_job(self, job_id):
+        """Heartbeat from the worker running a job: keeps its pending claim from going stale."""
+        self._connection().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'pending'",
+            (time.time(), job_id),
+        )
+
+    def fail_job(self, job_id, error):
+        self._connection().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def job(self, job_id):
+        row = self._connection().execute(
+            "SELECT id, title, bns_section, status, result, error, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "title", "bns_section", "status", "result", "error", "updated_at")
+        return dict(zip(keys, row))
+
+    def compacted_through(self):
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'compacted_through'").fetchone()
+        return int(row[0]) if row else 0
+
+    def pending(self, limit=None):
+        """Entries not yet folded into the mapping files, oldest first: [(id, bns_section, definition)]."""
+        return self._connection().execute(
+            "SELECT id, bns_section, definition FROM definitions WHERE id > ? ORDER BY id LIMIT ?",
+            (self.compacted_through(), -1 if limit is None else limit),
+        ).fetchall()
+
+    def _mark_compacted(self, last_id):
+        self._connection().execute(
+            "INSERT INTO meta (key, value) VALUES ('compacted_through', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (str(last_id),),
+        )
+
+    def compact(self, excel_path, json_path, batch_size=500):
+        """
+        Fold pending entries into the workbook and mapping.json, one batch per
+        rewrite of each file. Returns the number of entries applied. Safe to
+        run while the app is serving: both files are replaced atomically, and
+        the mapping.json lock keeps it from interleaving with another
+        compaction or a snapshot build.
+        """
+        applied = 0
+        with mapping_lock(json_path):
+            while True:
+                batch = self.pending(batch_size)
+                if not batch:
+                    return applied
+                _apply_to_workbook(batch, excel_path)
+                _apply_to_json(batch, json_path)
+                self._mark_compacted(batch[-1][0])
+                applied += len(batch)
+
+
+def _apply_to_workbook(batch, excel_path):
+    df = pd.read_excel(excel_path)
+    # One row per (row, BNS section) so each entry is a single vectorized match
+    sections = df["bns"].dropna().astype(str).str.split("&").explode().str.strip()
+    definitions = df["definition"].astype(object)
+    for _, bns_section, definition in batch:
+        rows = sections.index[sections == bns_section].unique()
+        definitions.loc[rows] = definition
+    df["definition"] = definitions
+
+    tmp_path = f"{excel_path}.{os.getpid()}.tmp.xlsx"
+    df.to_excel(tmp_path, index=False)
+    os.replace(tmp_path, excel_path)
+
+
+def _apply_to_json(batch, json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    by_section = {}
+    for item in data:
+        for bns_section in item["bns_section"] or ():
+            by_section.setdefault(bns_section, []).append(item)
+    for _, bns_section, definition in batch:
+        for item in by_section.get(bns_section, ()):
+            item["definition"] = definition
+    write_mapping_json(data, json_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the write-behind definition store")
+    parser.add_argument("command", choices=["compact", "pending"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--excel", default="mapping/mapping.xlsx")
+    parser.add_argument("--json", default="mapping/mapping.json")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    store = DefinitionStore(args.db)
+    if args.command == "pending":
+        print(f"{len(store.pending())} pending definitions")
+        return
+    applied = store.compact(args.excel, args.json, args.batch_size)
+    print(f"Compacted {applied} definitions into {args.excel} and {args.json}")
+    if applied:
+        # The workbook changed, so refresh the prebuilt snapshot too
+        build_snapshot(args.excel, args.json, args.snapshot)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock; callers still write atomically
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path, shared=False):
+    """Hold an exclusive (or shared) flock on `lock_path` for the duration of the block."""
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,84 +1,96 @@
+import os
 import pandas as pd
 import json
 
-def generate_mapping(excel_path="mapping.xlsx", json_path="mapping.json"):
-    df = pd.read_excel(excel_path)
+# Only these columns are read from the workbook
+MAPPING_COLUMNS = ["ipc_sec", "ipc_subsec", "title", "bns", "change", "term", "definition", "legal"]
+
+
+def read_mapping_frame(excel_path="mapping.xlsx"):
+    # openpyxl in read-only mode, skipping every column we don't use
+    return pd.read_excel(
+        excel_path,
+        usecols=lambda column: column in MAPPING_COLUMNS,
+        engine="openpyxl",
+        engine_kwargs={"read_only": True, "data_only": True},
+    )
+
+
+def _as_text(column):
+    # str(cell) for every cell, including "nan" for blanks (astype(str) keeps
+    # NaN as missing on pandas' string dtype)
+    return column.astype(str).fillna("nan")
+
+
+def _split(column, separator):
+    # "a , b" -> ["a", "b"]: same as [part.strip() for part in cell.split(separator)]
+    return _as_text(column).str.strip().str.split(rf"\s*{separator}\s*", regex=True)
+
+
+def _optional_text(column):
+    return column.astype(object).where(column.notna(), None)
+
+
+def build_records(df):
+    """
+    Turn the mapping DataFrame into the JSON-ready list of records, working on
+    whole columns with pandas string ops instead of walking rows.
+    """
+    ipc = _split(df["ipc_sec"], ",")
+    ipc_sub = _split(df["ipc_subsec"], ",").where(df["ipc_subsec"].notna(), None)
+    bns = _split(df["bns"], "&")
+    terms = _split(_as_text(df["term"]).str.lower(), "/")
+    titles = _as_text(df["title"])
+    change = _as_text(df["change"])
+    definition = _optional_text(df["definition"])
+    legal = _optional_text(df["legal"])
+
+    # Status only changes on "A"(dded) / "R"(emoved) rows and otherwise carries
+    # over from the previous row
+    status = pd.Series(None, index=df.index, dtype=object)
+    status[bns.str[0] == "R"] = "Removed"
+    status[ipc.str[0] == "A"] = "Added"
+    status = status.ffill().fillna("Mapped")
+
+    rows = list(zip(
+        ipc.tolist(), ipc_sub.tolist(), terms.tolist(), bns.tolist(),
+        titles.tolist(), change.tolist(), status.tolist(), definition.tolist(), legal.tolist(),
+    ))
+
+    # Rows with the same (ipc, ipc_sub, terms) collapse into one record: first
+    # position wins, last row's values win
     result = {}
-    status = "Mapped"
-    
-    for _, row in df.iterrows():
-        ipc = [i.strip() for i in str(row["ipc_sec"]).split(",")]
-        ipc_sub = [i_s.strip() for i_s in str(row["ipc_subsec"]).split(",")] if pd.notna(row['ipc_subsec']) else []
-        titles = str(row['title'])
-        bns = [b.strip() for b in str(row["bns"]).split("&")]
-        change = str(row["change"])
-        terms = [t.strip().lower() for t in str(row["term"]).split("/")] 
-        definition = str(row["definition"]) if pd.notna(row["definition"]) else None
-        legal = str(row["legal"]) if pd.notna(row["legal"]) else None
-
-        ipc = tuple(ipc)
-        ipc_sub = tuple(ipc_sub)
-        bns = tuple(bns)
-        terms = tuple(terms)
-    
-        if ipc[0] == "A":
-            status = "Added"
-        elif bns[0] == "R":
-            status = "Removed"    
-        else:
-            pass
-
-        key = (ipc, ipc_sub, terms)
-        result[key] = {
-            "bns_section": bns,
-            "titles": titles,
-            "change": change,
-            "status": status,
-            "definition": definition,
-            "legal": legal
-        }
+    for row in rows:
+        ipc_row, ipc_sub_row, terms_row = row[0], row[1] or [], row[2]
+        result[(tuple(ipc_row), tuple(ipc_sub_row), tuple(terms_row))] = row
 
-    # JSON keys cannot be tuples/lists, convert to string for saving
-    json_ready = [
+    return [
         {
-            "ipc_sec": list(k[0]),
-            "ipc_subsec": list(k[1]),
-            "terms": list(k[2]),
-            "bns_section": list(v["bns_section"]),
-            **{key: v[key] for key in v if key != "bns_section"}
+            "ipc_sec": ipc_row,
+            "ipc_subsec": ipc_sub_row or [],
+            "terms": terms_row,
+            "bns_section": bns_row,
+            "titles": title,
+            "change": change_row,
+            "status": status_row,
+            "definition": definition_row,
+            "legal": legal_row,
         }
-        for k, v in result.items()
+        for ipc_row, ipc_sub_row, terms_row, bns_row, title, change_row, status_row, definition_row, legal_row
+        in result.values()
     ]
 
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(json_ready, f, indent=4, ensure_ascii=False)
 
-    return json_ready
+def write_mapping_json(records, json_path="mapping.json"):
+    # Compact: no indentation or padding, the file is only read by machines.
+    # Written to a temp file and renamed so readers never see a partial file.
+    tmp_path = f"{json_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, json_path)
 
 
-def save_definition(bns_term: str, explanation: str, excel_path="mapping.xlsx", json_path="mapping.json"):
-    # Update Excel
-    df = pd.read_excel(excel_path)
-    
-    def update_row(row):
-        if pd.notna(row["bns"]):
-            bns = [b.strip() for b in str(row["bns"]).split("&")]
-            if bns_term in bns:
-                row["definition"] = explanation
-        return row
-    
-    df = df.apply(update_row, axis=1)
-    df.to_excel(excel_path, index=False)
-
-    # Update JSON
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    for item in data:
-        if item["bns_section"] and bns_term in item["bns_section"]:
-            item["definition"] = explanation
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-
-    return True
\ No newline at end of file
+def generate_mapping(excel_path="mapping.xlsx", json_path="mapping.json"):
+    json_ready = build_records(read_mapping_frame(excel_path))
+    write_mapping_json(json_ready, json_path)
+    return json_ready
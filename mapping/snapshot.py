@@ -0,0 +1,70 @@
+"""
+Build step: compile mapping.xlsx into mapping.json plus a prebuilt, pickled
+MappingSnapshot (records and all search indexes).
+
+The build is skipped when the workbook's content hash matches the one
+recorded in the existing snapshot, so booting a worker only costs a hash of
+the workbook instead of a pandas/openpyxl read and a JSON rewrite. A lock file
+next to mapping.json (mapping_lock) keeps concurrently booting workers, and
+definition compaction, from rewriting it at the same time.
+
+Usage:
+    python -m mapping.snapshot [--force] [excel_path json_path snapshot_path]
+"""
+import os
+import sys
+import hashlib
+from mapping.locking import file_lock
+from mapping.mapping import generate_mapping
+from mapping.store import MappingSnapshot, content_version, read_snapshot_header, save_snapshot
+
+EXCEL_PATH = "mapping/mapping.xlsx"
+JSON_PATH = "mapping/mapping.json"
+SNAPSHOT_PATH = "mapping/mapping.pkl"
+
+
+def mapping_lock(json_path):
+    """The lock every writer of mapping.json (snapshot builds, compaction) holds."""
+    return file_lock(json_path + ".lock")
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_current(header, workbook_hash, json_path):
+    if not header or header.get("workbook") != workbook_hash:
+        return False
+    try:
+        with open(json_path, "rb") as f:
+            return content_version(f.read()) == header.get("version")
+    except OSError:
+        return False
+
+
+def build_snapshot(excel_path=EXCEL_PATH, json_path=JSON_PATH, snapshot_path=SNAPSHOT_PATH, force=False):
+    """
+    Regenerate mapping.json and the snapshot if the workbook changed.
+    Returns True if a build ran, False if the existing snapshot was current.
+    """
+    with mapping_lock(json_path):
+        workbook_hash = file_digest(excel_path)
+        if not force and _is_current(read_snapshot_header(snapshot_path), workbook_hash, json_path):
+            return False
+
+        generate_mapping(excel_path, json_path)
+        with open(json_path, "rb") as f:
+            snapshot = MappingSnapshot.from_json(f.read())
+        save_snapshot(snapshot, snapshot_path, workbook=workbook_hash)
+        return True
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--force"]
+    paths = args if len(args) == 3 else [EXCEL_PATH, JSON_PATH, SNAPSHOT_PATH]
+    built = build_snapshot(*paths, force="--force" in sys.argv[1:])
+    print(f"{'Built' if built else 'Up to date'}: {os.path.abspath(paths[2])}")
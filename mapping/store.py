@@ -0,0 +1,196 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from types import MappingProxyType
+from mapping.classification import extract_classification
+from search.sections import SectionIndex
+from search.prefix import PrefixIndex
+from search.trigram import TrigramIndex
+
+
+SNAPSHOT_FORMAT = 3
+
+
+def content_version(raw):
+    """Version stamp for a mapping.json payload (bytes)."""
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _freeze(item):
+    """Return a read-only view of one mapping record (lists become tuples)."""
+    return MappingProxyType({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in item.items()
+    })
+
+
+class MappingSnapshot:
+    """
+    One immutable, fully loaded version of mapping.json plus the lookup
+    indexes built from it. Services take a snapshot once per request so every
+    lookup sees the same data.
+    """
+
+    __slots__ = ("records", "version", "titles", "sections", "prefixes", "infixes")
+
+    def __init__(self, records, version):
+        self.records = records
+        self.version = version
+        # Exact title -> first record with it (dropdown picks); titles repeat
+        self.titles = {}
+        for idx, item in enumerate(records):
+            self.titles.setdefault(item["titles"], idx)
+        self.sections = {
+            "ipc": SectionIndex(records, "ipc_sec", "ipc_subsec"),
+            "bns": SectionIndex(records, "bns_section"),
+        }
+        self.prefixes = PrefixIndex(records)
+        self.infixes = {
+            "terms": TrigramIndex(
+                (term.lower(), idx) for idx, item in enumerate(records) for term in item["terms"]
+            ),
+            "titles": TrigramIndex(
+                (item["titles"].lower(), idx) for idx, item in enumerate(records)
+            ),
+        }
+
+    @classmethod
+    def from_json(cls, raw):
+        """Parse mapping.json bytes into a snapshot (records + BNSS classification fields + indexes)."""
+        data = json.loads(raw.decode("utf-8"))
+        # Derived per-record fields are computed here, once per mapping version
+        records = tuple(_freeze({**item, **extract_classification(item.get("legal"))}) for item in data)
+        return cls(records, content_version(raw))
+
+    # Records are read-only proxies, which pickle can't handle; store them as
+    # plain dicts and re-freeze on load. The indexes pickle as they are.
+    def __getstate__(self):
+        return {
+            "records": [dict(item) for item in self.records],
+            "version": self.version,
+            "titles": self.titles,
+            "sections": self.sections,
+            "prefixes": self.prefixes,
+            "infixes": self.infixes,
+        }
+
+    def __setstate__(self, state):
+        self.records = tuple(_freeze(item) for item in state["records"])
+        self.version = state["version"]
+        self.titles = state["titles"]
+        self.sections = state["sections"]
+        self.prefixes = state["prefixes"]
+        self.infixes = state["infixes"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+def save_snapshot(snapshot, path, **header):
+    """
+    Write a snapshot to `path` atomically (temp file + rename).
+    The file holds two pickles: a small header, then the snapshot itself, so
+    read_snapshot_header() can check it without loading everything.
+    """
+    header = dict(header, format=SNAPSHOT_FORMAT, version=snapshot.version)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_header(path):
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return header
+
+
+def load_snapshot(path, version=None):
+    """Load a prebuilt snapshot; None if missing, unreadable or not for `version`."""
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+                return None
+            if version is not None and header.get("version") != version:
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+class MappingStore:
+    """
+    Process-resident holder for the mapping records.
+
+    The JSON file is parsed once per worker. Every snapshot() call does a cheap
+    os.stat(); the file is only re-read when its mtime/size changes, and only
+    re-parsed when the content hash actually differs.
+
+    If `snapshot_path` points at a prebuilt snapshot (see mapping/snapshot.py)
+    whose version matches mapping.json, it is loaded instead of parsing the
+    JSON and rebuilding the indexes.
+    """
+
+    def __init__(self, json_path, snapshot_path=None):
+        self.json_path = json_path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._stat = None
+        self._snapshot = None
+
+    def snapshot(self):
+        try:
+            st = os.stat(self.json_path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            # Keep serving the last good copy if the file is briefly missing
+            # (e.g. while it is being rewritten); fail only if we never loaded.
+            if self._snapshot is None:
+                raise FileNotFoundError(self.json_path)
+            return self._snapshot
+
+        if stat != self._stat:
+            with self._lock:
+                if stat != self._stat:
+                    self._reload(stat)
+        return self._snapshot
+
+    @property
+    def records(self):
+        return self.snapshot().records
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def _reload(self, stat):
+        with open(self.json_path, "rb") as f:
+            raw = f.read()
+
+        version = content_version(raw)
+        if self._snapshot is None or self._snapshot.version != version:
+            snapshot = None
+            if self.snapshot_path:
+                snapshot = load_snapshot(self.snapshot_path, version)
+            if snapshot is None:
+                try:
+                    snapshot = MappingSnapshot.from_json(raw)
+                except ValueError:
+                    # Caught the file half-written; retry on the next request
+                    if self._snapshot is None:
+                        raise
+                    return
+            self._snapshot = snapshot
+        self._stat = stat
@@ -0,0 +1,205 @@
+"""
+Request instrumentation: per-stage timing spans, returned to the client as a
+Server-Timing header, and Prometheus text-format metrics for /metrics.
+
+Services wrap their stages in `with span("parse"):` and so on. Spans are only
+recorded while app.py is timing a request (start_request / finish_request,
+per thread); anywhere else span() hands back a shared no-op, so the services
+cost the same as before when called from scripts and benchmarks.
+
+Everything here is per process: under gunicorn each worker counts its own
+requests, and a scrape of /metrics sees whichever worker answered it.
+"""
+import time
+import bisect
+import threading
+
+# Request and stage latencies, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_local = threading.local()
+
+
+class _Span:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Repeated stages (e.g. two lookups) add up under one name
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Time a stage of the current request (a no-op outside start_request/finish_request)."""
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        return _NULL_SPAN
+    return _Span(timings, name)
+
+
+def start_request():
+    _local.timings = {}
+
+
+def finish_request():
+    """The {stage: seconds} recorded since start_request(), in the order stages first ran."""
+    timings = getattr(_local, "timings", None) or {}
+    _local.timings = None
+    return timings
+
+
+def server_timing(timings, total=None):
+    """Format {stage: seconds} as a Server-Timing header value (durations in ms)."""
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def family(name, kind, help_text, samples):
+    """Exposition lines for one metric family; samples are [(suffix, label_names, label_values, value)]."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, names, values, value in samples:
+        lines.append(f"{name}{suffix}{_labels(names, values)} {_number(value)}")
+    return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return family(self.name, "counter", self.help, [("", self.labels, key, value) for key, value in values])
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label value tuple."""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [count per bucket (+Inf last), sum]
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        samples = []
+        bucket_labels = self.labels + ("le",)
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", bucket_labels, key + (_number(bound),), cumulative))
+            samples.append(("_sum", self.labels, key, total))
+            samples.append(("_count", self.labels, key, cumulative))
+        return family(self.name, "histogram", self.help, samples)
+
+
+request_seconds = Histogram("section_mapper_request_seconds", "Request latency by route.", ("route",))
+stage_seconds = Histogram("section_mapper_stage_seconds", "Time spent per request stage.", ("route", "stage"))
+requests_total = Counter("section_mapper_requests_total", "Requests by route and status code.", ("route", "status"))
+
+
+def observe_request(route, status, seconds, timings):
+    request_seconds.observe(seconds, route)
+    requests_total.inc(route, str(status))
+    for stage, stage_time in timings.items():
+        stage_seconds.observe(stage_time, route, stage)
+
+
+def cache_families(caches):
+    """Hit/miss counters and hit ratios for {name: stats dict} (ResponseCache.stats() shape)."""
+    def samples(field):
+        return [("", ("cache",), (name,), stats[field]) for name, stats in caches.items()]
+
+    return (
+        family("section_mapper_cache_hits_total", "counter", "Cache hits.", samples("hits"))
+        + family("section_mapper_cache_misses_total", "counter", "Cache misses.", samples("misses"))
+        + family("section_mapper_cache_hit_ratio", "gauge", "Hits / lookups since start.", samples("hit_ratio"))
+    )
+
+
+def ai_families(stats):
+    """AI client counters from AIClient.stats()."""
+    lines = []
+    for field, help_text in (
+        ("calls", "Explanations requested from the AI client."),
+        ("attempts", "Model calls made, including retries."),
+        ("retries", "Model calls retried after a 429 or 5xx."),
+        ("throttled", "429s from the API plus calls turned away by the local limiter."),
+        ("successes", "Explanations returned."),
+        ("failures", "Explanations that failed after retries."),
+    ):
+        lines += family(f"section_mapper_ai_{field}_total", "counter", help_text, [("", (), (), stats.get(field, 0))])
+    lines += family(
+        "section_mapper_ai_queue_wait_seconds_total", "counter", "Time spent waiting in the AI rate limiter.",
+        [("", (), (), stats.get("queue_wait_total", 0.0))],
+    )
+    return lines
+
+
+def render(*extra):
+    """The full /metrics payload: request metrics plus any extra families (lists of lines)."""
+    lines = request_seconds.render() + stage_seconds.render() + requests_total.render()
+    for more in extra:
+        lines += more
+    return "\n".join(lines) + "\n"
@@ -1,10 +1,111 @@
 import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Compiled once at import; parse() used to rebuild these on every call
+_SUBSECTION_KEYWORD = re.compile(r'subsection|sub-section|\bsub\s|\bsubsec\b')
+# All filler words in one alternation, stripped in a single pass
+_FILLER_WORDS = re.compile(r'\b(?:ipc|bns|section|sec|subsection|sub-section|subsec)\b')
+# "23", "153AA", "23(1)", "23 (a)"
+_SECTION = re.compile(r'^([0-9]+[a-z]*)(?:\s*\(([a-z0-9]+)\))?$')
+# "23 1", "23-1" - only honoured when a subsection keyword was used
+_SECTION_SPACED = re.compile(r'^([0-9]+[a-z]*)[\s\-]+([a-z0-9]+)$')
+_SECTION_QUERY = re.compile(r'^(ipc|bns|section|sec|sub)?\s*\d+')
+_LEADING_NUMBER = re.compile(r'^(\d+)')
+
+PARSE_CACHE_SIZE = 4096
+
+
+class ParsedQuery(NamedTuple):
+    """
+    A search query parsed once per request.
+
+    text: the stripped query as typed
+    lower: lowercased text, used for term/title matching
+    cleaned: lowercased text with ipc/bns/section/subsection filler removed
+    section, subsection: as returned by parse(), uppercased, or None
+    key: section_key(section, subsection), "" if no section was found
+    base_key: section_key(section), the section without its subsection
+    joined_key: for a single-letter subsection, the lettered section it may
+        mean instead ("326(a)" → "326A"), else ""
+    number: leading integer of the section (for range checks) or None
+    is_section_query: the query starts like a section reference ("ipc 3..", "420")
+    """
+    text: str
+    lower: str
+    cleaned: str
+    section: Optional[str]
+    subsection: Optional[str]
+    key: str
+    base_key: str
+    joined_key: str
+    number: Optional[int]
+    is_section_query: bool
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_query(query):
+    text = query.strip()
+    lower = text.lower()
+
+    # Check if "subsection" or "sub" keywords are present BEFORE removing them
+    has_subsection_keyword = _SUBSECTION_KEYWORD.search(lower) is not None
+
+    # Remove common words but preserve the structure
+    cleaned = _FILLER_WORDS.sub('', lower).strip()
+
+    section = subsection = None
+    # Pattern 1: "23(1)" or "23 (1)" or "23(a)", or a bare section like "153AA", "420"
+    match = _SECTION.match(cleaned)
+    # Pattern 2: "23 1" or "23-1" (space or dash separated) - ONLY if subsection keyword was used
+    if not match and has_subsection_keyword:
+        match = _SECTION_SPACED.match(cleaned)
+    if match:
+        section = match.group(1).upper()
+        subsection = match.group(2).upper() if match.group(2) else None
+
+    number = None
+    if section:
+        number = int(_LEADING_NUMBER.match(section).group(1))
+
+    # "326(a)" may mean section 326A, which the mapping cites without parentheses
+    joined_key = ""
+    if subsection and len(subsection) == 1 and subsection.isalpha():
+        joined_key = section_key(section + subsection)
+
+    return ParsedQuery(
+        text=text,
+        lower=lower,
+        cleaned=cleaned,
+        section=section,
+        subsection=subsection,
+        key=section_key(section, subsection),
+        base_key=section_key(section),
+        joined_key=joined_key,
+        number=number,
+        is_section_query=_SECTION_QUERY.match(lower) is not None,
+    )
+
+
+def parse_query(query, mode='ipc'):
+    """
+    Parse a query into a ParsedQuery. Results are memoized (bounded LRU), so
+    repeated keystrokes and repeated lookups within a request are free.
+    `mode` is accepted for symmetry with parse(); parsing is the same for IPC and BNS.
+    """
+    return _parse_query(query or "")
+
+
+def parse_many(queries, mode='ipc'):
+    """Parse a batch of queries, in order. Duplicates are served from the memo cache."""
+    return [parse_query(query, mode) for query in queries]
+
 
 def parse(query, mode='ipc'):
     """
     Parse various section formats and extract section number and subsection.
     Returns: (section_number, subsection_number or None)
-    
+
     Examples:
     "IPC 23(1)" → ("23", "1")
     "23 subsection 2" → ("23", "2")
@@ -17,39 +118,25 @@ def parse(query, mode='ipc'):
     """
     if not query:
         return (None, None)
-    
-    original_query = query.strip()
-    query_lower = query.lower().strip()
-    
-    # Check if "subsection" or "sub" keywords are present BEFORE removing them
-    has_subsection_keyword = (
-        "subsection" in query_lower or 
-        "sub-section" in query_lower or 
-        re.search(r'\bsub\s', query_lower) or
-        re.search(r'\bsubsec\b', query_lower)
-    )
-    
-    # Remove common words but preserve the structure
-    query_clean = query_lower
-    query_clean = re.sub(r'\b(ipc|bns|IPC|Ipc|BNS|Bns|ipc section |bns section )\b', '', query_clean)
-    query_clean = re.sub(r'\b(section|sec)\b', '', query_clean)
-    query_clean = re.sub(r'\b(subsection|sub-section|subsec)\b', '', query_clean)
-    query_clean = query_clean.strip()
-    
-    # Pattern 1: "23(1)" or "23 (1)" or "23(a)" - section with subsection in parentheses
-    match = re.search(r'^([0-9]+[A-Za-z]*)\s*\(([A-Za-z0-9]+)\)$', query_clean)
-    if match:
-        return (match.group(1).upper(), match.group(2).upper())
-    
-    # Pattern 2: "23 1" or "23-1" (space or dash separated) - ONLY if subsection keyword was used
-    if has_subsection_keyword:
-        match = re.search(r'^([0-9]+[A-Za-z]*)[\s\-]+([A-Za-z0-9]+)$', query_clean)
-        if match:
-            return (match.group(1).upper(), match.group(2).upper())
-    
-    # Pattern 3: Complete section number like "153AA", "29A", "8", "420"
-    match = re.search(r'^([0-9]+[A-Za-z]*)$', query_clean)
-    if match:
-        return (match.group(1).upper(), None)
-    
-    return (None, None)
\ No newline at end of file
+
+    parsed = parse_query(query, mode)
+    return (parsed.section, parsed.subsection)
+
+
+def section_key(section, subsection=None):
+    """
+    Canonical lookup key for a section reference, used on both the mapping
+    side and the query side so they can be compared with a dict lookup.
+
+    Examples:
+    "1 (6)" → "1(6)"
+    "103\\n(1)" → "103(1)"
+    ("153aa", None) → "153AA"
+    ("23", "1") → "23(1)"
+    """
+    if section is None:
+        return ""
+    key = "".join(str(section).split()).upper()
+    if subsection:
+        key += "(" + "".join(str(subsection).split()).upper() + ")"
+    return key
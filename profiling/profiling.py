@@ -0,0 +1,184 @@
+"""
+Opt-in per-request profiling for the Flask views.
+
+Off unless PROFILE_ENABLED is set. Once enabled, a request is profiled when
+it carries the trigger header (X-Profile: 1) or falls in the random
+PROFILE_SAMPLE_RATE share. Each profile goes to PROFILE_DIR as either
+
+  pstats     cProfile output (deterministic): `python -m pstats FILE`, snakeviz
+  collapsed  sampled stacks, one "frame;frame;... count" per line, for
+             flamegraph.pl / speedscope
+
+next to a .json with the route, query, search_mode, status and duration it
+was taken for. Only the newest PROFILE_KEEP profiles are kept.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import cProfile
+import threading
+import logging
+import functools
+from flask import request
+
+log = logging.getLogger(__name__)
+
+FORMATS = ("pstats", "collapsed")
+
+# Characters allowed in the client-supplied part of a profile filename
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class RequestProfiler:
+    def __init__(self, directory="profiles", sample_rate=0.0, header="X-Profile", keep=200,
+                 output="pstats", interval=0.001):
+        if output not in FORMATS:
+            raise ValueError(f"unknown profile format {output!r}, expected one of {FORMATS}")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.header = header
+        self.keep = keep
+        self.output = output
+        self.interval = interval
+        # cProfile can only run one profiler at a time (per process on 3.12+);
+        # requests that arrive while one is running are served unprofiled
+        self._busy = threading.Lock()
+        self._files_lock = threading.Lock()
+
+    def wanted(self):
+        if request.headers.get(self.header, "").strip().lower() in ("1", "true", "yes"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def wrap(self, view, route):
+        @functools.wraps(view)
+        def profiled(*args, **kwargs):
+            if not self.wanted() or not self._busy.acquire(blocking=False):
+                return view(*args, **kwargs)
+            try:
+                return self._profile(view, route, args, kwargs)
+            finally:
+                self._busy.release()
+        return profiled
+
+    def _profile(self, view, route, args, kwargs):
+        start = time.perf_counter()
+        if self.output == "pstats":
+            profiler = cProfile.Profile()
+            response = profiler.runcall(view, *args, **kwargs)
+            elapsed = time.perf_counter() - start
+            save = profiler.dump_stats
+        else:
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                response = view(*args, **kwargs)
+            finally:
+                sampler.stop()
+            elapsed = time.perf_counter() - start
+            save = sampler.dump
+        try:
+            self._write(save, route, elapsed, response)
+        except Exception:
+            # A profile that can't be written must not cost the caller its response
+            log.exception("could not write profile for %s", route)
+        return response
+
+    def _write(self, save, route, elapsed, response):
+        query, search_mode = _request_tags()
+        tags = {
+            "route": route,
+            "query": query,
+            "search_mode": search_mode,
+            "status": getattr(response, "status_code", None) or (response[1] if isinstance(response, tuple) else 200),
+            "duration_ms": round(elapsed * 1000, 3),
+            "pid": os.getpid(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "format": self.output,
+        }
+        slug = route.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "home"
+        # search_mode comes from the client: only a short, path-safe form goes
+        # into the filename; the raw value is kept in the .json
+        mode = _UNSAFE_NAME.sub("", search_mode)[:32] or "none"
+        name = f"{time.time_ns()}_{os.getpid()}_{slug}_{mode}"
+        extension = "prof" if self.output == "pstats" else "collapsed"
+        os.makedirs(self.directory, exist_ok=True)
+        save(os.path.join(self.directory, f"{name}.{extension}"))
+        with open(os.path.join(self.directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(tags, f)
+        self._rotate()
+
+    def _rotate(self):
+        with self._files_lock:
+            # Names start with a nanosecond timestamp, so sorting puts the oldest first
+            stems = sorted({os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                            if name.endswith((".prof", ".collapsed", ".json"))})
+            for stem in stems[:max(0, len(stems) - self.keep)]:
+                for extension in (".prof", ".collapsed", ".json"):
+                    try:
+                        os.remove(os.path.join(self.directory, stem + extension))
+                    except FileNotFoundError:
+                        pass
+
+
+def _request_tags():
+    """(query, search_mode) from the form/query string, else from a JSON body like /explain_batch's."""
+    values = request.values
+    query, search_mode = values.get("query", ""), values.get("search_mode", "")
+    if not (query and search_mode):
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            queries = body.get("query") or body.get("queries") or ""
+            if isinstance(queries, list):
+                queries = ", ".join(str(item) for item in queries)
+            query = query or str(queries)
+            search_mode = search_mode or str(body.get("search_mode", ""))
+    return query, search_mode
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def install(app, profiler):
+    """Wrap every view registered on `app` (call after the routes are defined)."""
+    wrapped = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static" or rule.endpoint in wrapped:
+            continue
+        app.view_functions[rule.endpoint] = profiler.wrap(app.view_functions[rule.endpoint], rule.rule)
+        wrapped.add(rule.endpoint)
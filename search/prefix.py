@@ -0,0 +1,53 @@
+from bisect import bisect_left
+
+# Match tiers, in the order autocomplete has always ranked them
+TERM_EXACT = 80
+TERM_PREFIX = 70
+TITLE_PREFIX = 60
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index over lowercased `terms` and `titles`.
+
+    Every string is lowercased once at build time and kept in a sorted list;
+    a query bisects to the first key >= query and walks forward only while
+    keys still start with it, so records that don't match are never touched.
+    """
+
+    def __init__(self, records):
+        terms = []
+        titles = []
+        for idx, item in enumerate(records):
+            for term in item["terms"]:
+                terms.append((term.lower(), idx))
+            titles.append((item["titles"].lower(), idx))
+
+        terms.sort()
+        titles.sort()
+        self._term_keys = [key for key, _ in terms]
+        self._term_ids = [idx for _, idx in terms]
+        self._title_keys = [key for key, _ in titles]
+        self._title_ids = [idx for _, idx in titles]
+
+    @staticmethod
+    def _walk(keys, ids, prefix):
+        pos = bisect_left(keys, prefix)
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            yield keys[pos], ids[pos]
+            pos += 1
+
+    def search(self, query_lower):
+        """
+        Return {record_index: tier} for every record with a term equal to the
+        query (80), a term starting with it (70) or a title starting with it (60).
+        Each record keeps its best tier.
+        """
+        tiers = {}
+        for key, idx in self._walk(self._term_keys, self._term_ids, query_lower):
+            tier = TERM_EXACT if key == query_lower else TERM_PREFIX
+            if tier > tiers.get(idx, 0):
+                tiers[idx] = tier
+        for _, idx in self._walk(self._title_keys, self._title_ids, query_lower):
+            tiers.setdefault(idx, TITLE_PREFIX)
+        return tiers
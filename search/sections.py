@@ -0,0 +1,68 @@
+from parsing.parsing import section_key
+from search.trigram import TrigramIndex
+
+
+class SectionIndex:
+    """
+    Hash index from canonical section keys to the records that cite them.
+
+    Every section string in `field` is normalised once with section_key() and
+    registered under its own key (exact match) and under each parent key
+    (e.g. "137(1)(A)" is also filed under "137(1)" and "137"), so both
+    "section" and "section(subsection)" queries resolve with one dict lookup.
+    For IPC, `subfield` (ipc_subsec) is folded in to give keys like "23(1)".
+    """
+
+    def __init__(self, records, field, subfield=None):
+        self._exact = {}
+        self._nested = {}
+        raw_entries = []
+
+        for idx, item in enumerate(records):
+            entries = [entry.strip() for entry in item[field]]
+            if subfield:
+                subsections = [sub.strip() for sub in item[subfield] if sub.strip()]
+                entries += [f"{entry}({sub})" for entry in entries for sub in subsections]
+
+            for entry in entries:
+                key = section_key(entry)
+                if not key:
+                    continue
+                self._exact.setdefault(key, []).append((idx, entry))
+                for pos, char in enumerate(key):
+                    if char == "(" and pos:
+                        self._nested.setdefault(key[:pos], []).append((idx, entry))
+
+            # Raw strings for the "query appears anywhere in the section" fallback
+            for entry in item[field]:
+                raw_entries.append((entry.lower(), idx))
+
+        self._raw = TrigramIndex(raw_entries)
+
+    def find(self, key):
+        """
+        Return [(record_index, is_exact)] in mapping order for every record
+        citing `key` itself or one of its subsections.
+        """
+        hits = {}
+        for idx, _ in self._nested.get(key, ()):
+            hits[idx] = False
+        for idx, _ in self._exact.get(key, ()):
+            hits[idx] = True
+        return sorted(hits.items())
+
+    def find_any(self, *keys):
+        """find() for the first of `keys` that has any hits ("" keys are skipped)."""
+        for key in keys:
+            hits = self.find(key) if key else []
+            if hits:
+                return hits
+        return []
+
+    def entries(self, key):
+        """Section strings as written in the mapping that fall under `key`."""
+        return sorted({entry for _, entry in self._exact.get(key, []) + self._nested.get(key, [])})
+
+    def containing(self, text):
+        """Record indexes (in mapping order) whose raw section string contains `text`."""
+        return self._raw.search(text)
@@ -0,0 +1,65 @@
+GRAM = 3
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class TrigramIndex:
+    """
+    Character n-gram inverted index for "query appears anywhere in the text"
+    lookups.
+
+    Built from (text, doc_id) pairs. Identical texts are stored once. Each
+    trigram (and bigram, for two-letter queries) maps to the sorted ids of the
+    texts containing it. A search intersects the posting lists of the query's
+    trigrams, smallest first, and only verifies the few texts that survive
+    with a real substring check.
+    """
+
+    def __init__(self, entries):
+        text_ids = {}
+        owners = []
+        for text, doc_id in entries:
+            if text not in text_ids:
+                text_ids[text] = len(owners)
+                owners.append(set())
+            owners[text_ids[text]].add(doc_id)
+
+        self._texts = list(text_ids)
+        self._owners = [sorted(docs) for docs in owners]
+        self._postings = {}
+        for text_id, text in enumerate(self._texts):
+            for size in (2, GRAM):
+                for gram in _grams(text, size):
+                    self._postings.setdefault(gram, []).append(text_id)
+
+    def _candidates(self, query):
+        if len(query) < 2:
+            # Too short to index; fall back to checking every distinct text
+            return range(len(self._texts))
+        if len(query) == 2:
+            return self._postings.get(query, ())
+
+        lists = []
+        for gram in _grams(query, GRAM):
+            posting = self._postings.get(gram)
+            if not posting:
+                return ()
+            lists.append(posting)
+        lists.sort(key=len)
+
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query):
+        """Return the sorted doc ids of every text containing `query`."""
+        docs = set()
+        for text_id in self._candidates(query):
+            if query in self._texts[text_id]:
+                docs.update(self._owners[text_id])
+        return sorted(docs)
@@ -1,167 +1,87 @@
-import json
-from parsing.parsing import parse
+import heapq
+from metrics.metrics import span
+from parsing.parsing import parse_query
+from search.prefix import TERM_EXACT
 
-def autocomplete_service(query, search_mode, JSON_PATH):
-    with open(JSON_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def autocomplete_service(query, search_mode, store, limit=10):
+    """
+    Return up to `limit` suggestions (all of them if limit is None), best first.
 
+    Match tiers are evaluated in priority order and the first tier to claim a
+    record decides its score. Only the current top `limit` are kept (min-heap),
+    display payloads are built for those survivors only, and the remaining
+    tiers are skipped once none of them can beat the current k-th score.
+    """
+    with span("snapshot"):
+        snapshot = store.snapshot()
+    data = snapshot.records
+    with span("parse"):
+        parsed = parse_query(query, search_mode)
+    query_lower = parsed.lower
+
+    # (best score the tier can give, function yielding (record index, score))
+    tiers = []
+
+    # Resolve section matches through the prebuilt index
+    sections = snapshot.sections.get(search_mode)
+    if sections is not None:
+        if parsed.section:
+            # Exact section (or the requested subsection) scores 100,
+            # subsections of a bare section query score 90; "326(a)" falls
+            # back to section 326A
+            tiers.append((100, lambda: (
+                (idx, 100 if is_exact or parsed.subsection else 90)
+                for idx, is_exact in sections.find_any(parsed.key, parsed.joined_key)
+            )))
+
+        # Fallback for BNS: partial matching against the section strings
+        if search_mode == "bns":
+            clean_query = query_lower.replace("bns", "").replace("section", "").replace("sec", "").strip()
+            tiers.append((60, lambda: ((idx, 60) for idx in sections.containing(clean_query))))
+
+    # Then check term matches (lower priority than section matches):
+    # exact term (80), term starts with query (70), title starts with query (60)
+    tiers.append((TERM_EXACT, lambda: snapshot.prefixes.search(query_lower).items()))
+
+    # Check if any term (50) or the title (40) contains the query
+    tiers.append((50, lambda: ((idx, 50) for idx in snapshot.infixes["terms"].search(query_lower))))
+    tiers.append((40, lambda: ((idx, 40) for idx in snapshot.infixes["titles"].search(query_lower))))
+
+    with span("match"):
+        claimed = set()
+        top = []  # min-heap of (score, -record index); the root is the current k-th best
+
+        for pos, (_, candidates) in enumerate(tiers):
+            best_remaining = max(best for best, _ in tiers[pos:])
+            if limit is not None and len(top) >= limit and top[0][0] > best_remaining:
+                break
+
+            for idx, score in candidates():
+                if idx in claimed:
+                    continue
+                claimed.add(idx)
+
+                # Penalize longer titles (they're usually less specific)
+                entry = (score - len(data[idx]["titles"]) / 100, -idx)
+                if limit is None or len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+    # Sort by score descending (ties keep mapping order)
+    with span("payload"):
         suggestions = []
-        query_lower = query.lower()
-        
-        for item in data:
+        for _, neg_idx in sorted(top, reverse=True):
+            item = data[-neg_idx]
             title = item["titles"]
             ipc_sections = ", ".join(item["ipc_sec"])
             bns_sections = ", ".join(item["bns_section"])
-            
-            score = 0
-            match_found = False
-            
-            # If search mode is BNS, prioritize BNS section matching
-            if search_mode == "bns":
-                clean_query = query_lower.replace("bns", "").replace("section", "").replace("sec", "").strip()
-                
-                # Parse the query to extract section and subsection
-                section_num, subsec_num = parse(query, 'bns')
-                
-                if section_num:
-                    # Check for exact section match
-                    for bns in item["bns_section"]:
-                        bns_clean = bns.strip()
-                        
-                        # If user specified subsection, match it precisely
-                        if subsec_num:
-                            # Normalize both for comparison (remove spaces and parens, uppercase)
-                            bns_normalized = bns_clean.replace(" ", "").replace("(", "").replace(")", "").upper()
-                            # Build expected pattern: section+subsection (e.g., "16" for section 1, subsec 6)
-                            search_normalized = f"{section_num}{subsec_num}".replace(" ", "").replace("(", "").replace(")", "").upper()
-                            
-                            # Also check with parentheses format
-                            search_with_parens = f"{section_num}({subsec_num})".upper()
-                            bns_with_parens = bns_clean.upper()
-                            
-                            if (search_normalized == bns_normalized or 
-                                search_with_parens == bns_with_parens or
-                                bns_with_parens.startswith(search_with_parens + " ") or
-                                bns_with_parens.startswith(search_with_parens + ",")):
-                                score += 100
-                                match_found = True
-                                break
-                        else:
-                            # Exact match for section (including letters like 153AA)
-                            if bns_clean.upper() == section_num.upper():
-                                score += 100
-                                match_found = True
-                                break
-                            # Check if it starts with the section number followed by space or comma
-                            elif (bns_clean.upper().startswith(section_num.upper() + " ") or 
-                                  bns_clean.upper().startswith(section_num.upper() + ",") or
-                                  bns_clean.upper().startswith(section_num.upper() + "(")):
-                                score += 90
-                                match_found = True
-                                break
-                
-                # Fallback: partial matching
-                if not match_found:
-                    for bns in item["bns_section"]:
-                        if clean_query in bns.lower():
-                            score += 60
-                            match_found = True
-                            break
-            
-            # If search mode is IPC or no BNS match, continue with normal matching
-            if search_mode == "ipc" or not match_found:
-                # Check IPC section match FIRST (highest priority)
-                if search_mode == "ipc":
-                    section_num, subsec_num = parse(query, 'ipc')
-                    
-                    if section_num:
-                        for ipc in item["ipc_sec"]:
-                            ipc_clean = ipc.strip()
-                            
-                            if subsec_num:
-                                # Normalize both for comparison (remove spaces and parens, uppercase)
-                                ipc_normalized = ipc_clean.replace(" ", "").replace("(", "").replace(")", "").upper()
-                                # Build expected pattern: section+subsection
-                                search_normalized = f"{section_num}{subsec_num}".replace(" ", "").replace("(", "").replace(")", "").upper()
-                                
-                                # Also check with parentheses format
-                                search_with_parens = f"{section_num}({subsec_num})".upper()
-                                ipc_with_parens = ipc_clean.upper()
-                                
-                                if (search_normalized == ipc_normalized or 
-                                    search_with_parens == ipc_with_parens or
-                                    ipc_with_parens.startswith(search_with_parens + " ") or
-                                    ipc_with_parens.startswith(search_with_parens + ",")):
-                                    score += 100
-                                    match_found = True
-                                    break
-                            else:
-                                # Exact match for section (including letters like 153AA, 29A)
-                                if ipc_clean.upper() == section_num.upper():
-                                    score += 100
-                                    match_found = True
-                                    break
-                                # Check if it starts with the section number followed by delimiter
-                                elif (ipc_clean.upper().startswith(section_num.upper() + " ") or 
-                                      ipc_clean.upper().startswith(section_num.upper() + ",") or
-                                      ipc_clean.upper().startswith(section_num.upper() + "(")):
-                                    score += 90
-                                    match_found = True
-                                    break
-                
-                # Then check term matches (lower priority than section matches)
-                if not match_found:
-                    # Check exact term match
-                    for term in item["terms"]:
-                        if query_lower == term.lower():
-                            score += 80
-                            match_found = True
-                            break
-                    
-                    # Check if term starts with query
-                    if not match_found:
-                        for term in item["terms"]:
-                            if term.lower().startswith(query_lower):
-                                score += 70
-                                match_found = True
-                                break
-                    
-                    # Check if title starts with query
-                    if not match_found and title.lower().startswith(query_lower):
-                        score += 60
-                        match_found = True
-                    
-                    # Check if any term contains query
-                    if not match_found:
-                        for term in item["terms"]:
-                            if query_lower in term.lower():
-                                score += 50
-                                match_found = True
-                                break
-                    
-                    # Check if title contains query
-                    if not match_found and query_lower in title.lower():
-                        score += 40
-                        match_found = True
-            
-            if match_found:
-                # Penalize longer titles (they're usually less specific)
-                length_penalty = len(title) / 100
-                final_score = score - length_penalty
-                
-                suggestions.append({
-                    "title": title,
-                    "ipc": ipc_sections,
-                    "bns": bns_sections,
-                    "display": f"{title[:80]}{'...' if len(title) > 80 else ''} (IPC: {ipc_sections})",
-                    "score": final_score
-                })
-        
-        # Sort by score descending
-        suggestions.sort(key=lambda x: x["score"], reverse=True)
-        
-        # Remove score from final output and limit to 10
-        for s in suggestions:
-            del s["score"]
-        
-        return suggestions
\ No newline at end of file
+
+            suggestions.append({
+                "title": title,
+                "ipc": ipc_sections,
+                "bns": bns_sections,
+                "display": f"{title[:80]}{'...' if len(title) > 80 else ''} (IPC: {ipc_sections})",
+            })
+
+    return suggestions
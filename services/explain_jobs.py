@@ -0,0 +1,178 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from ai.backends import load_backend
+
+
+class JobQueueFull(Exception):
+    """Raised when the background pool already has max_pending jobs queued or running."""
+
+
+class JobFailed(Exception):
+    """The generation this caller was waiting on failed (possibly in another worker)."""
+
+
+def job_id_for(title, bns_section):
+    # Deterministic, so every worker hands out the same id for the same record
+    return hashlib.blake2b(f"{bns_section}\0{title}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ExplanationJobs:
+    """
+    Coordinates AI explanation generation so each record is generated once.
+
+    Single flight: within a process, concurrent callers for the same record
+    share one in-flight Future; across gunicorn workers, the job row in the
+    DefinitionStore database decides which worker generates, and the others
+    wait for that row to finish. The result is appended to the DefinitionStore
+    so later requests read it as a cached definition.
+
+    explain() generates (or waits) synchronously. submit() returns a job id
+    straight away and runs the job on a bounded background pool: `max_workers`
+    threads, at most `max_pending` jobs queued or running per process.
+    status() works from any worker.
+
+    While a job runs, its worker refreshes the job row every stale_after / 3
+    seconds, however long the AI call takes (limiter queueing, retries). A
+    pending row that goes `stale_after` seconds (default: wait_timeout)
+    without a refresh was left by a dead worker and can be claimed again.
+    """
+
+    def __init__(self, definitions, generate=None, max_workers=4, max_pending=32,
+                 wait_timeout=60, poll_interval=0.1, stale_after=None):
+        self.definitions = definitions
+        # Defaults to the AI_BACKEND generator
+        self.generate = generate or load_backend()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self.stale_after = wait_timeout if stale_after is None else stale_after
+        self.poll_interval = poll_interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self):
+        # Threads and in-flight state don't survive a fork (gunicorn --preload),
+        # so build them lazily in the process that uses them
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="explain")
+                    self._slots = threading.BoundedSemaphore(self.max_pending)
+                    self._inflight = {}
+                    self._pid = os.getpid()
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.stale_after / 3):
+            self.definitions.touch_job(job_id)
+
+    def _run(self, job_id, title, bns_section):
+        # Keep the claim fresh so other workers don't take over a live job
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, stop), daemon=True).start()
+        try:
+            explanation = self.generate(title)
+        except Exception as e:
+            self.definitions.fail_job(job_id, str(e))
+            raise
+        finally:
+            stop.set()
+        self.definitions.put(bns_section, explanation)
+        self.definitions.finish_job(job_id, explanation)
+        return explanation
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._inflight.pop(job_id, None)
+
+    def submit(self, title, bns_section):
+        job_id = job_id_for(title, bns_section)
+        self._ensure_pool()
+
+        with self._lock:
+            if job_id in self._inflight:
+                return job_id
+            if not self._slots.acquire(blocking=False):
+                raise JobQueueFull()
+            if not self.definitions.claim_job(job_id, title, bns_section, self.stale_after):
+                # Already pending in another worker, or already done
+                self._slots.release()
+                return job_id
+            future = self._executor.submit(self._run, job_id, title, bns_section)
+            self._inflight[job_id] = future
+
+        def done(_):
+            self._forget(job_id)
+            self._slots.release()
+        future.add_done_callback(done)
+        return job_id
+
+    def explain(self, title, bns_section):
+        """
+        Return the explanation for a record, generating it at most once across
+        concurrent callers. Raises JobFailed if the shared generation failed and
+        TimeoutError if it didn't finish within wait_timeout.
+        """
+        job_id = job_id_for(title, bns_section)
+        self._ensure_pool()
+
+        leader = False
+        with self._lock:
+            future = self._inflight.get(job_id)
+            if future is None and self.definitions.claim_job(job_id, title, bns_section, self.stale_after):
+                future = Future()
+                self._inflight[job_id] = future
+                leader = True
+
+        if leader:
+            try:
+                explanation = self._run(job_id, title, bns_section)
+                future.set_result(explanation)
+                return explanation
+            except Exception as e:
+                future.set_exception(JobFailed(str(e)))
+                raise JobFailed(str(e))
+            finally:
+                self._forget(job_id)
+
+        if future is not None:
+            # Someone in this process is already generating it
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except (JobFailed, TimeoutError):
+                raise
+            except Exception as e:
+                raise JobFailed(str(e))
+
+        return self._wait_for_job(job_id)
+
+    def _wait_for_job(self, job_id):
+        # Another worker owns the job (or it already finished): watch its row
+        deadline = time.monotonic() + self.wait_timeout
+        delay = self.poll_interval
+        while True:
+            job = self.definitions.job(job_id)
+            if job is None:
+                raise JobFailed("job disappeared")
+            if job["status"] == "done":
+                return job["result"]
+            if job["status"] == "failed":
+                raise JobFailed(job["error"] or "generation failed")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"explanation job {job_id} still pending")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def status(self, job_id):
+        job = self.definitions.job(job_id)
+        if job is None:
+            return None
+        status = {"job_id": job_id, "status": job["status"], "title": job["title"]}
+        if job["status"] == "done":
+            status["explanation"] = job["result"]
+            status["source"] = "AI Generated"
+        elif job["status"] == "failed":
+            status["error"] = job["error"]
+        return status
@@ -485,6 +485,8 @@ document.getElementById('searchForm').addEventListener('submit', async (e) => {
         formData.append('query', query);
         formData.append('selected_title', selectedTitle);
         formData.append('search_mode', currentSearchMode);
+        // Ask for the mapping data straight away; the AI explanation is polled for
+        formData.append('async', '1');
         
         const response = await fetch('/explain_term', {
             method: 'POST',
@@ -501,6 +503,10 @@ document.getElementById('searchForm').addEventListener('submit', async (e) => {
             
             if (response.ok) {
                 currentResultData = data;
+                if (data.job_id) {
+                    data.explanation = '_Generating a simple explanation..._';
+                    pollExplanation(data.job_id);
+                }
                 displayResult(data);
                 resultCard.classList.add('show');
                 selectedTitleInput.value = '';
@@ -518,6 +524,34 @@ document.getElementById('searchForm').addEventListener('submit', async (e) => {
     }
 });
 
+function pollExplanation(jobId, attempt = 0) {
+    setTimeout(async () => {
+        // Stop if the user has moved on to another result
+        if (!currentResultData || currentResultData.job_id !== jobId) return;
+        
+        try {
+            const response = await fetch(`/explain_status/${jobId}`);
+            const status = await response.json();
+            if (!currentResultData || currentResultData.job_id !== jobId) return;
+            
+            if (status.status === 'done') {
+                currentResultData.explanation = status.explanation;
+                currentResultData.source = status.source;
+            } else if (status.status === 'failed' || !response.ok || attempt >= 60) {
+                currentResultData.explanation = 'AI explanation could not be generated. Please try again.';
+                currentResultData.source = 'AI Error';
+            } else {
+                pollExplanation(jobId, attempt + 1);
+                return;
+            }
+            delete currentResultData.job_id;
+            displayResult(currentResultData);
+        } catch (error) {
+            if (attempt < 60) pollExplanation(jobId, attempt + 1);
+        }
+    }, 1000);
+}
+
 function renderMarkdown(text) {
     if (!text || text === 'None') return '';
     return marked.parse(text);
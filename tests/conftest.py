@@ -0,0 +1,33 @@
+"""
+Shared fixtures. Tests never reach Gemini: the app is imported with the
+local stub backend (ai/stub.py).
+"""
+import os
+import pytest
+
+# Read when ai.backends is first imported, so it has to be set before any test module loads
+os.environ["AI_BACKEND"] = "stub"
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module with a fresh definition log, job coordinator and caches."""
+    import app
+    from ai.backends import load_backend
+    from cache.cache import ResponseCache
+    from mapping.definitions import DefinitionStore
+    from services.explain_jobs import ExplanationJobs
+
+    definitions = DefinitionStore(str(tmp_path / "definitions.sqlite3"))
+    monkeypatch.setattr(app, "definitions", definitions)
+    monkeypatch.setattr(app, "explain_jobs", ExplanationJobs(
+        definitions, generate=load_backend("stub"), poll_interval=0.01,
+    ))
+    monkeypatch.setattr(app, "autocomplete_cache", ResponseCache(64, 600))
+    monkeypatch.setattr(app, "explain_cache", ResponseCache(64, 600))
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,120 @@
+"""
+Rate-limited, retrying AI client (ai/client.py) and its token bucket (ai/ratelimit.py).
+"""
+import pytest
+from ai.client import AIBusy, AIClient, AIEmptyResponse, AIUnavailable, _status_code
+from ai.ratelimit import TokenBucket
+
+
+class APIError(Exception):
+    def __init__(self, code, message="error"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__("request failed")
+        self.response = Response(status_code)
+
+
+class FakeSend:
+    """Plays back results in order; exceptions are raised."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def client_for(send, **kwargs):
+    sleeps = []
+    kwargs.setdefault("rate_per_min", 0)
+    kwargs.setdefault("max_retries", 2)
+    return AIClient(send, sleep=sleeps.append, **kwargs), sleeps
+
+
+def test_429_is_retried_with_backoff_then_succeeds():
+    send = FakeSend(APIError(429), "an explanation")
+    client, sleeps = client_for(send, base_delay=1.0)
+    assert client.generate("theft") == "an explanation"
+    assert send.prompts == ["theft", "theft"]
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= 1.0
+    stats = client.stats()
+    assert (stats["attempts"], stats["retries"], stats["throttled"], stats["successes"], stats["failures"]) == (2, 1, 1, 1, 0)
+
+
+def test_busy_after_retries_run_out():
+    send = FakeSend(*[APIError(429)] * 3)
+    client, sleeps = client_for(send, max_retries=2, base_delay=1.0, max_delay=1.5)
+    with pytest.raises(AIBusy):
+        client.generate("theft")
+    assert len(send.prompts) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= 1.5 for delay in sleeps)
+    assert client.stats()["failures"] == 1
+
+
+def test_5xx_is_retried_and_then_unavailable():
+    client, sleeps = client_for(FakeSend(HTTPError(503), HTTPError(500), HTTPError(502)))
+    with pytest.raises(AIUnavailable):
+        client.generate("theft")
+    assert len(sleeps) == 2
+
+
+def test_status_numbers_in_the_message_are_not_retried():
+    send = FakeSend(ValueError("prompt is 500 tokens over the 429 limit"))
+    client, sleeps = client_for(send)
+    with pytest.raises(AIUnavailable):
+        client.generate("theft")
+    assert len(send.prompts) == 1
+    assert sleeps == []
+
+
+def test_status_code_comes_from_the_exception():
+    assert _status_code(APIError(429)) == 429
+    assert _status_code(HTTPError(503)) == 503
+    assert _status_code(RuntimeError("HTTP 503")) is None
+
+
+@pytest.mark.parametrize("text", ["", "   ", None])
+def test_empty_response_is_an_error(text):
+    client, _ = client_for(FakeSend(text))
+    with pytest.raises(AIEmptyResponse):
+        client.generate("theft")
+    assert client.stats()["failures"] == 1
+
+
+def test_queue_timeout_turns_callers_away_without_calling_the_api():
+    send = FakeSend("first")
+    client, sleeps = client_for(send, rate_per_min=1, burst=1, queue_timeout=5)
+    assert client.generate("theft") == "first"
+    # The next token is 60s away, beyond the 5s the caller is willing to queue
+    with pytest.raises(AIBusy):
+        client.generate("theft")
+    assert send.prompts == ["theft"]
+    stats = client.stats()
+    assert (stats["throttled"], stats["failures"], stats["attempts"]) == (1, 1, 1)
+    assert sleeps == []
+
+
+def test_token_bucket_queues_callers_at_the_refill_rate():
+    now = [0.0]
+    sleeps = []
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleeps.append)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    assert sleeps == [0.5, 1.0]
+    # Would have to wait 1.5s: refused, and no token is taken
+    assert bucket.acquire(timeout=1.0) is None
+    now[0] += 1.0  # back to 0 tokens: half a second to the next one
+    assert bucket.acquire(timeout=1.0) == 0.5
@@ -0,0 +1,123 @@
+"""
+Response cache (cache/cache.py) and how app.py uses it.
+"""
+import json
+import shutil
+from cache.cache import ResponseCache, make_key
+from mapping.store import MappingStore
+from services.explain_jobs import ExplanationJobs
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(maxsize=2, ttl=60, clock=Clock())
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+    assert stats["hit_ratio"] == 0.75
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(maxsize=10, ttl=5, clock=clock)
+    cache.put("a", 1)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a", "gone") == "gone"
+    stats = cache.stats()
+    assert (stats["size"], stats["expirations"], stats["evictions"]) == (0, 1, 0)
+
+
+def test_get_or_compute_computes_once():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_compute("k", compute) == "value"
+    assert cache.get_or_compute("k", compute) == "value"
+    assert len(calls) == 1
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = ResponseCache(maxsize=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_make_key_ignores_case_and_padding_of_the_query():
+    assert make_key("v1", "ipc", " Theft ") == make_key("v1", "ipc", "theft")
+    assert make_key("v1", "ipc", "theft") != make_key("v2", "ipc", "theft")
+    assert make_key("v1", "ipc", "theft") != make_key("v1", "bns", "theft")
+
+
+def explain(client, query, **form):
+    return client.post("/explain_term", data=dict(query=query, search_mode="ipc", **form))
+
+
+def test_final_explain_answers_are_cached(client, app_module):
+    cache = app_module.explain_cache
+    assert explain(client, "1").status_code == 200
+    assert explain(client, "999").status_code == 404
+    assert cache.stats()["size"] == 2
+
+    first = explain(client, "1").get_json()
+    assert explain(client, "999").status_code == 404
+    assert cache.stats()["hits"] == 2
+    assert first["source"] == "Cached"
+
+
+def test_pending_and_busy_answers_are_not_cached(client, app_module, monkeypatch):
+    cache = app_module.explain_cache
+    pending = explain(client, "33", **{"async": "1"}).get_json()
+    assert pending["source"] == "Pending"
+    assert cache.stats()["size"] == 0
+
+    monkeypatch.setattr(app_module, "explain_jobs", ExplanationJobs(app_module.definitions, max_pending=0))
+    busy = explain(client, "47", **{"async": "1"}).get_json()
+    assert busy["source"] == "AI Busy"
+    assert cache.stats()["size"] == 0
+
+
+def test_mapping_edit_changes_every_key(client, app_module, monkeypatch, tmp_path):
+    json_path = str(tmp_path / "mapping.json")
+    shutil.copy(app_module.JSON_PATH, json_path)
+    store = MappingStore(json_path)
+    monkeypatch.setattr(app_module, "store", store)
+
+    def suggest():
+        response = client.post("/autocomplete", data={"query": "short title", "search_mode": "ipc"})
+        return response.get_json()["suggestions"][0]["title"]
+
+    title = suggest()
+    assert suggest() == title
+    assert app_module.autocomplete_cache.stats()["hits"] == 1
+    version = store.version
+
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    for item in data:
+        if item["titles"] == title:
+            item["titles"] = title + " (edited)"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    assert suggest() == title + " (edited)"
+    assert store.version != version
+    assert app_module.autocomplete_cache.stats()["hits"] == 1
@@ -0,0 +1,151 @@
+"""
+Flask endpoints (app.py), run in-process against the real mapping with the
+stub AI backend.
+"""
+import time
+import threading
+import pytest
+from ai.client import BUSY_MESSAGE
+from services import explain_service as explain_module
+from services.explain_jobs import ExplanationJobs
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/explain_status/{job_id}").get_json()
+        if status["status"] != "pending" or time.monotonic() > deadline:
+            return status
+        time.sleep(0.01)
+
+
+def test_batch_keeps_order_and_reports_failures_per_item(client, monkeypatch):
+    calls = []
+    find_match = explain_module._find_match
+
+    def counting_find_match(query, *args):
+        calls.append(query)
+        return find_match(query, *args)
+
+    monkeypatch.setattr(explain_module, "_find_match", counting_find_match)
+
+    queries = ["1", "999", "", "33", "1", None]
+    response = client.post("/explain_batch", json={"queries": queries, "search_mode": "ipc"})
+    assert response.status_code == 200
+    body = response.get_json()
+
+    assert [item["query"] for item in body["results"]] == ["1", "999", "", "33", "1", ""]
+    assert [item["status"] for item in body["results"]] == [200, 404, 400, 200, 200, 400]
+    assert body["errors"] == 3
+    assert "out of range" in body["results"][1]["error"]
+
+    cached, missing = body["results"][0]["result"], body["results"][3]["result"]
+    assert cached["source"] == "Cached" and cached["explanation"]
+    assert body["results"][4] == body["results"][0]
+    # Without "ai", missing explanations are reported rather than generated
+    assert (missing["source"], missing["explanation"]) == ("Not Generated", None)
+    assert "job_id" not in missing
+    # Repeated queries are resolved once
+    assert calls == ["1", "999", "33"]
+
+
+def test_batch_with_ai_queues_missing_explanations(client):
+    response = client.post("/explain_batch", json={"queries": ["33", "1", "33"], "ai": True})
+    results = response.get_json()["results"]
+
+    pending = results[0]["result"]
+    assert (pending["source"], pending["explanation"]) == ("Pending", "pending")
+    assert results[2] == results[0]
+    assert results[1]["result"]["source"] == "Cached"
+    assert "job_id" not in results[1]["result"]
+
+    assert wait_for_job(client, pending["job_id"])["status"] == "done"
+
+
+@pytest.mark.parametrize("body", [["302"], "302", 5, None, {}, {"queries": []}, {"queries": "302"}])
+def test_batch_rejects_bodies_without_a_queries_list(client, body):
+    response = client.post("/explain_batch", json=body)
+    assert response.status_code == 400
+    assert "queries" in response.get_json()["error"]
+
+
+def test_batch_size_is_capped(client, app_module):
+    queries = ["1"] * (app_module.BATCH_MAX_ITEMS + 1)
+    response = client.post("/explain_batch", json={"queries": queries})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("query, section", [("326(a)", "326A"), ("326 (a)", "326A"), ("326(b)", "326B")])
+def test_ipc_lettered_subsection_resolves_to_lettered_section(client, query, section):
+    response = client.post("/explain_term", data={"query": query, "search_mode": "ipc"})
+    assert response.status_code == 200
+    assert response.get_json()["ipc_sections"] == section
+
+    suggestions = client.post("/autocomplete", data={"query": query, "search_mode": "ipc"}).get_json()["suggestions"]
+    assert suggestions[0]["ipc"] == section
+
+
+def test_selected_title_picks_first_record_with_that_title(client, app_module):
+    records = app_module.store.snapshot().records
+    title = "Commutation of sentence"
+    first = next(item for item in records if item["titles"] == title)
+    assert sum(1 for item in records if item["titles"] == title) > 1
+
+    # The query text doesn't matter once a dropdown title is picked
+    response = client.post("/explain_term", data={"query": "zzz", "selected_title": title, "search_mode": "ipc"})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["title"], body["ipc_sections"]) == (title, ", ".join(first["ipc_sec"]))
+
+
+def test_async_explain_returns_a_job_to_poll(client):
+    response = client.post("/explain_term", data={"query": "33", "search_mode": "ipc", "async": "1"})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["source"], body["explanation"]) == ("Pending", "pending")
+
+    status = wait_for_job(client, body["job_id"])
+    assert status["status"] == "done"
+    assert status["source"] == "AI Generated"
+    assert body["title"] in status["explanation"]
+
+    # Once done, the explanation is served from the definition log
+    again = client.post("/explain_term", data={"query": "33", "search_mode": "ipc", "async": "1"}).get_json()
+    assert (again["source"], again["explanation"]) == ("Cached", status["explanation"])
+    assert "job_id" not in again
+
+
+def test_async_explain_is_busy_when_the_pool_is_full(client, app_module, monkeypatch):
+    release = threading.Event()
+
+    def slow(title):
+        release.wait(10)
+        return f"explanation of {title}"
+
+    monkeypatch.setattr(app_module, "explain_jobs", ExplanationJobs(
+        app_module.definitions, generate=slow, max_workers=1, max_pending=1, poll_interval=0.01,
+    ))
+    first = client.post("/explain_term", data={"query": "33", "search_mode": "ipc", "async": "1"}).get_json()
+    assert first["source"] == "Pending"
+    busy = client.post("/explain_term", data={"query": "47", "search_mode": "ipc", "async": "1"}).get_json()
+    assert (busy["source"], busy["explanation"]) == ("AI Busy", BUSY_MESSAGE)
+    assert "job_id" not in busy
+    assert client.get(f"/explain_status/{first['job_id']}").get_json()["status"] == "pending"
+
+    release.set()
+    assert wait_for_job(client, first["job_id"])["status"] == "done"
+    # The slot is freed just after the job row is marked done
+    deadline = time.monotonic() + 10
+    while True:
+        retry = client.post("/explain_term", data={"query": "47", "search_mode": "ipc", "async": "1"}).get_json()
+        if retry["source"] != "AI Busy" or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert retry["source"] == "Pending"
+    assert wait_for_job(client, retry["job_id"])["status"] == "done"
+
+
+def test_unknown_job_id_is_404(client):
+    response = client.get("/explain_status/0123456789abcdef")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Unknown job id"}
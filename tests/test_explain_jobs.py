@@ -0,0 +1,188 @@
+"""
+Single-flight AI generation (services/explain_jobs.py) and the append-only
+definition log behind it (mapping/definitions.py).
+"""
+import json
+import time
+import threading
+import pandas as pd
+import pytest
+from mapping.definitions import DefinitionStore
+from mapping.snapshot import build_snapshot, mapping_lock
+from services.explain_jobs import ExplanationJobs, JobFailed, job_id_for
+
+
+class Generator:
+    """Counts calls; optionally slow or failing."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, title):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"explanation of {title}"
+
+
+@pytest.fixture
+def definitions(tmp_path):
+    return DefinitionStore(str(tmp_path / "definitions.sqlite3"))
+
+
+def test_concurrent_explains_generate_once(definitions):
+    generate = Generator(delay=0.3)
+    # Two coordinators on one database stand in for two gunicorn workers
+    workers = [ExplanationJobs(definitions, generate=generate, poll_interval=0.01) for _ in range(2)]
+    results = []
+    barrier = threading.Barrier(8)
+
+    def call(jobs):
+        barrier.wait()
+        results.append(jobs.explain("Theft", "303(2)"))
+
+    threads = [threading.Thread(target=call, args=(workers[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generate.calls == 1
+    assert results == ["explanation of Theft"] * 8
+    assert definitions.lookup(["303(2)"]) == "explanation of Theft"
+    assert definitions.job(job_id_for("Theft", "303(2)"))["status"] == "done"
+
+
+def test_failed_job_is_not_persisted_and_can_be_claimed_again(definitions):
+    failing = ExplanationJobs(definitions, generate=Generator(error=RuntimeError("quota")))
+    with pytest.raises(JobFailed):
+        failing.explain("Theft", "303(2)")
+
+    job_id = job_id_for("Theft", "303(2)")
+    assert definitions.lookup(["303(2)"]) is None
+    assert definitions.job(job_id)["status"] == "failed"
+    assert definitions.pending() == []
+
+    generate = Generator()
+    retry = ExplanationJobs(definitions, generate=generate)
+    assert retry.explain("Theft", "303(2)") == "explanation of Theft"
+    assert generate.calls == 1
+    assert definitions.job(job_id)["status"] == "done"
+
+
+def test_stale_claim_from_dead_worker_is_taken_over(definitions):
+    job_id = job_id_for("Theft", "303(2)")
+    # A worker claimed the job and died before finishing it
+    assert definitions.claim_job(job_id, "Theft", "303(2)")
+
+    generate = Generator()
+    jobs = ExplanationJobs(definitions, generate=generate, wait_timeout=0.2, stale_after=30, poll_interval=0.01)
+    # While the claim is fresh, callers wait on it and give up at wait_timeout
+    with pytest.raises(TimeoutError):
+        jobs.explain("Theft", "303(2)")
+    assert generate.calls == 0
+
+    definitions._connection().execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - 31, job_id))
+    assert jobs.explain("Theft", "303(2)") == "explanation of Theft"
+    assert generate.calls == 1
+    assert definitions.job(job_id)["status"] == "done"
+
+
+def test_abandoned_claim_goes_stale_after_wait_timeout(definitions):
+    job_id = job_id_for("Theft", "303(2)")
+    assert definitions.claim_job(job_id, "Theft", "303(2)")
+
+    generate = Generator()
+    jobs = ExplanationJobs(definitions, generate=generate, wait_timeout=0.2, poll_interval=0.01)
+    assert jobs.stale_after == jobs.wait_timeout
+    with pytest.raises(TimeoutError):
+        jobs.explain("Theft", "303(2)")
+    # The caller that timed out (or the next one) takes the job over itself
+    assert jobs.explain("Theft", "303(2)") == "explanation of Theft"
+    assert generate.calls == 1
+
+
+def test_live_job_is_not_taken_over_while_it_runs_past_stale_after(definitions):
+    generate = Generator(delay=0.6)
+    # Two coordinators stand in for two workers; the generation outlasts stale_after several times
+    leader, other = (ExplanationJobs(definitions, generate=generate, wait_timeout=5, stale_after=0.15,
+                                     poll_interval=0.01) for _ in range(2))
+    results = []
+    thread = threading.Thread(target=lambda: results.append(leader.explain("Theft", "303(2)")))
+    thread.start()
+    time.sleep(0.3)
+    results.append(other.explain("Theft", "303(2)"))
+    thread.join()
+
+    assert generate.calls == 1
+    assert results == ["explanation of Theft"] * 2
+
+
+def test_done_job_is_not_claimed_again(definitions):
+    job_id = job_id_for("Theft", "303(2)")
+    assert definitions.claim_job(job_id, "Theft", "303(2)")
+    definitions.finish_job(job_id, "done already")
+    assert not definitions.claim_job(job_id, "Theft", "303(2)", stale_after=0)
+
+
+def test_compact_folds_every_entry_into_json_and_workbook(definitions, tmp_path):
+    excel_path = str(tmp_path / "mapping.xlsx")
+    json_path = str(tmp_path / "mapping.json")
+    rows = [
+        {"ipc_sec": "379", "bns": "303(2)", "definition": None},
+        {"ipc_sec": "302", "bns": "103(1)", "definition": None},
+        {"ipc_sec": "304B", "bns": "80", "definition": "kept"},
+        {"ipc_sec": "420", "bns": "318(4) & 319", "definition": None},
+    ]
+    pd.DataFrame(rows).to_excel(excel_path, index=False)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"ipc_sec": [row["ipc_sec"]], "bns_section": [b.strip() for b in row["bns"].split("&")],
+             "definition": row["definition"]}
+            for row in rows
+        ], f)
+
+    definitions.put_many([("303(2)", "theft v1"), ("103(1)", "murder"), ("319", "cheating")])
+    definitions.put("303(2)", "theft v2")
+    # Small batches, so compaction has to carry on across several rewrites
+    assert definitions.compact(excel_path, json_path, batch_size=2) == 4
+    assert definitions.pending() == []
+    assert definitions.compact(excel_path, json_path, batch_size=2) == 0
+
+    expected = ["theft v2", "murder", "kept", "cheating"]
+    with open(json_path, encoding="utf-8") as f:
+        assert [item["definition"] for item in json.load(f)] == expected
+    assert pd.read_excel(excel_path)["definition"].tolist() == expected
+
+
+def test_compaction_and_snapshot_build_share_the_mapping_json_lock(definitions, tmp_path):
+    json_path = str(tmp_path / "mapping.json")
+    excel_path = str(tmp_path / "mapping.xlsx")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump([], f)
+    finished = []
+
+    def run(name, writer):
+        try:
+            writer()
+        except FileNotFoundError:
+            pass  # there is no workbook; only when each writer got the lock matters
+        finished.append(name)
+
+    with mapping_lock(json_path):
+        threads = [
+            threading.Thread(target=run, args=("compact", lambda: definitions.compact(excel_path, json_path))),
+            threading.Thread(target=run, args=("build", lambda: build_snapshot(excel_path, json_path, str(tmp_path / "mapping.pkl")))),
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        assert finished == []
+    for thread in threads:
+        thread.join(5)
+    assert sorted(finished) == ["build", "compact"]
@@ -0,0 +1,181 @@
+"""
+BNS scraper (legal/legal.py) against the local fixture server (legal/fixtures.py).
+"""
+import pickle
+import pandas as pd
+import pytest
+from legal import legal
+from legal.fixtures import load_entries, render_section_page, start_server
+
+ENTRIES = load_entries()
+SECTIONS = (1, 2, 5, 6, 7, 10)
+
+
+class RecordingLimiter(legal.HostRateLimiter):
+    def __init__(self):
+        super().__init__(rate=1000, burst=1000)
+        self.hosts = []
+
+    def acquire(self, host):
+        self.hosts.append(host)
+        super().acquire(host)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(legal, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch, sleeps):
+    """Start a fixture server for SECTIONS and point the scraper (and a fresh cache) at it."""
+    servers = []
+
+    def start(**kwargs):
+        pages = {n: render_section_page(n, *ENTRIES[n]) for n in SECTIONS}
+        server = start_server(pages, **kwargs)
+        servers.append(server)
+        monkeypatch.setattr(legal, "BASE_URL", server.base_url)
+        monkeypatch.setattr(legal, "cache", legal.ScrapeCache(str(tmp_path / "bns_cache.sqlite3")))
+        monkeypatch.setattr(legal, "limiter", RecordingLimiter())
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_sections_stores_every_section_once(serve, capsys):
+    server = serve()
+    assert legal.fetch_sections([1, 5, 6, 6, 7]) == []
+    assert legal.cache.fetched() == {1, 5, 6, 7}
+    for n in (1, 5, 6, 7):
+        assert legal.cache.section_entries(n) == ENTRIES[n][1]
+    assert legal.cache.validators(6)[1] is not None  # ETag kept for --refresh
+    assert server.requests["200"] == 4
+
+    # Everything is cached now
+    assert legal.fetch_sections([1, 5, 6, 7]) == []
+    assert server.requests["200"] == 4
+
+
+def test_fetch_retries_503_and_429_and_honours_retry_after(serve, sleeps, capsys):
+    server = serve(faults={5: [503, 429]}, retry_after=2)
+    assert legal.fetch_sections([1, 5]) == []
+    assert legal.cache.section_entries(5) == ENTRIES[5][1]
+    assert (server.requests["503"], server.requests["429"], server.requests["200"]) == (1, 1, 2)
+    assert sleeps == [2.0, 2.0]
+    # Retries wait their turn in the per-host limiter too
+    assert len(legal.limiter.hosts) == 4
+    assert set(legal.limiter.hosts) == {server.base_url.split("/")[2]}
+
+
+def test_section_that_keeps_failing_is_reported_and_not_cached(serve, capsys):
+    server = serve(faults={6: [503] * (legal.MAX_RETRIES + 1)})
+    assert legal.fetch_sections([5, 6]) == [6]
+    assert legal.cache.fetched() == {5}
+    assert server.requests["503"] == legal.MAX_RETRIES + 1
+    assert "[FETCH] 6... ERROR" in capsys.readouterr().out
+
+
+def test_host_rate_limiter_spaces_requests_per_host(monkeypatch):
+    now = [100.0]
+    waits = []
+    monkeypatch.setattr(legal, "monotonic", lambda: now[0])
+    monkeypatch.setattr(legal, "sleep", waits.append)
+
+    limiter = legal.HostRateLimiter(rate=4, burst=2)
+    for _ in range(4):
+        limiter.acquire("devgan.in")
+    # The burst goes straight through; each later request queues 1/rate behind the last
+    assert waits == [0.25, 0.5]
+
+    # Another host has its own bucket
+    limiter.acquire("example.org")
+    assert waits == [0.25, 0.5]
+
+    # Tokens come back at `rate` per second, up to the burst
+    now[0] += 10
+    waits.clear()
+    limiter.acquire("devgan.in")
+    limiter.acquire("devgan.in")
+    assert waits == []
+
+
+def test_pickle_migration_runs_once(tmp_path):
+    pickle_path = tmp_path / "bns_cache.pkl"
+
+    def write_pickle(sections):
+        old = {}
+        for n in sections:
+            section_type, entries = ENTRIES[n]
+            old[f"__meta__{n}"] = {"type": section_type, "keys": list(entries)}
+            old.update(entries)
+        with open(pickle_path, "wb") as f:
+            pickle.dump(old, f)
+
+    write_pickle([5, 6])
+    cache = legal.ScrapeCache(str(tmp_path / "bns_cache.sqlite3"))
+    assert cache.migrate_pickle(str(pickle_path)) == 2
+    assert cache.fetched() == {5, 6}
+    assert cache.section_entries(5) == ENTRIES[5][1]
+    assert cache.meta(5) == {"type": ENTRIES[5][0], "keys": list(ENTRIES[5][1])}
+
+    # The meta row stops a second import, even of sections added to the pickle since
+    write_pickle([5, 6, 7])
+    assert cache.migrate_pickle(str(pickle_path)) == 0
+    assert cache.fetched() == {5, 6}
+    assert legal.ScrapeCache(cache.db_path).migrate_pickle(str(pickle_path)) == 0
+
+
+def test_restarted_fill_workbook_only_fetches_missing_sections(serve, capsys):
+    server = serve()
+    # An earlier run got as far as section 5 before it was interrupted
+    assert legal.fetch_sections([5]) == []
+
+    df = pd.DataFrame({"bns": ["5(1)", "6", "R", "7", "not a section", "5 (2)"]})
+    counts = legal.fill_workbook(df)
+
+    assert server.requests["200"] == 3
+    assert legal.cache.fetched() == {5, 6, 7}
+    assert counts == {"filled": 4, "empty": 0, "invalid": 1}
+    assert [None if pd.isna(text) else text for text in df["legal"]] == [
+        ENTRIES[5][1]["5(1)"], ENTRIES[6][1]["6"], None, ENTRIES[7][1]["7"], "", ENTRIES[5][1]["5(2)"],
+    ]
+
+    # A second restart has nothing left to fetch
+    legal.fill_workbook(pd.DataFrame({"bns": ["5(1)", "6", "7"]}))
+    assert server.requests["200"] == 3
+
+
+def test_refresh_rewrites_only_changed_rows_and_reports_them(serve, tmp_path, capsys):
+    server = serve()
+    df = pd.DataFrame({"bns": ["5(1)", "6", "7", "10"]})
+    legal.fill_workbook(df)
+    before = df["legal"].tolist()
+
+    # Section 7's text changes; section 10's page changes around an identical section row
+    section_type, entries = ENTRIES[7]
+    amended = dict(entries, **{"7": entries["7"] + " (amended)"})
+    server.set_page(7, render_section_page(7, section_type, amended))
+    server.set_page(10, render_section_page(10, *ENTRIES[10]).replace("All rights reserved.", "Updated."))
+    # A row for a section that was never fetched
+    df.loc[len(df)] = {"bns": "2(1)", "legal": None}
+
+    report_path = tmp_path / "report.txt"
+    assert legal.refresh_workbook(df, str(report_path)) == [(3, "7"), (5, "2(1)")]
+
+    assert server.requests["304"] == 2  # sections 5 and 6
+    assert df["legal"].tolist()[:4] == [before[0], before[1], amended["7"], before[3]]
+    assert df.at[4, "legal"] == ENTRIES[2][1]["2(1)"]
+    assert legal.cache.section_entries(7) == amended
+
+    report = report_path.read_text(encoding="utf-8")
+    for line in ("not-modified: 2", "unchanged: 1", "changed: 1", "new: 1", "failed: 0", "rows updated: 2",
+                 "Row 3: 7", "Row 5: 2(1)", "=== Section 7 ===", "=== Section 2 ===", "+ 2(1) (added)"):
+        assert line in report, line
+    assert "=== Section 10 ===" not in report
+    assert f"+{amended['7'].splitlines()[-1]}" in report
@@ -0,0 +1,97 @@
+"""
+Request instrumentation (metrics/metrics.py): Prometheus exposition, spans,
+Server-Timing, and the /metrics endpoint.
+"""
+import re
+from cache.cache import ResponseCache
+from metrics import metrics
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_bounds():
+    histogram = metrics.Histogram("demo_seconds", "Demo latency.", ("route",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value, "/a")
+    histogram.observe(0.5, "/b")
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="/a",le="0.01"} 2',
+        'demo_seconds_bucket{route="/a",le="0.1"} 3',
+        'demo_seconds_bucket{route="/a",le="1.0"} 3',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a"} 2.065',
+        'demo_seconds_count{route="/a"} 4',
+        'demo_seconds_bucket{route="/b",le="0.01"} 0',
+        'demo_seconds_bucket{route="/b",le="0.1"} 0',
+        'demo_seconds_bucket{route="/b",le="1.0"} 1',
+        'demo_seconds_bucket{route="/b",le="+Inf"} 1',
+        'demo_seconds_sum{route="/b"} 0.5',
+        'demo_seconds_count{route="/b"} 1',
+    ]
+
+
+def test_counter_labels_are_escaped():
+    counter = metrics.Counter("demo_total", "Demo count.", ("route", "status"))
+    counter.inc('/say "hi"', "200")
+    counter.inc('/say "hi"', "200", amount=2)
+    assert counter.render()[2] == 'demo_total{route="/say \\"hi\\"",status="200"} 3'
+
+
+def test_cache_hit_ratio_family():
+    cache = ResponseCache(maxsize=10)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    lines = metrics.cache_families({"explain_term": cache.stats()})
+    assert 'section_mapper_cache_hits_total{cache="explain_term"} 2' in lines
+    assert 'section_mapper_cache_misses_total{cache="explain_term"} 1' in lines
+    ratio = next(line for line in lines if line.startswith("section_mapper_cache_hit_ratio{"))
+    assert abs(float(ratio.split()[-1]) - 2 / 3) < 1e-9
+    assert "# TYPE section_mapper_cache_hit_ratio gauge" in lines
+
+
+def test_spans_record_only_inside_a_request():
+    with metrics.span("parse"):
+        pass
+    assert metrics.finish_request() == {}
+
+    metrics.start_request()
+    with metrics.span("parse"):
+        pass
+    with metrics.span("match"):
+        pass
+    with metrics.span("parse"):
+        pass
+    timings = metrics.finish_request()
+    assert list(timings) == ["parse", "match"]
+    assert metrics.server_timing({"parse": 0.0012, "match": 0.5}, 0.75) == (
+        "parse;dur=1.20, match;dur=500.00, total;dur=750.00"
+    )
+
+
+def test_responses_carry_server_timing(client):
+    response = client.post("/explain_term", data={"query": "theft", "search_mode": "ipc"})
+    stages = dict(part.split(";dur=") for part in response.headers["Server-Timing"].split(", "))
+    assert {"cache", "snapshot", "parse", "match", "total"} <= set(stages)
+    assert all(float(duration) >= 0 for duration in stages.values())
+
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    client.post("/autocomplete", data={"query": "theft", "search_mode": "ipc"})
+    client.post("/autocomplete", data={"query": "theft", "search_mode": "ipc"})
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+    body = response.get_data(as_text=True)
+    assert 'section_mapper_requests_total{route="/autocomplete",status="200"}' in body
+    assert re.search(r'^section_mapper_request_seconds_bucket\{route="/autocomplete",le="\+Inf"\} \d+$', body, re.M)
+    assert re.search(r'^section_mapper_stage_seconds_count\{route="/autocomplete",stage="match"\} \d+$', body, re.M)
+    assert 'section_mapper_cache_hit_ratio{cache="autocomplete"} 0.5' in body
+    assert "# TYPE section_mapper_ai_calls_total counter" in body
+    # Every sample line is "name{labels} value"
+    for line in body.splitlines():
+        if not line.startswith("#"):
+            assert re.match(r'^[a-z_]+(\{[^}]*\})? [-+0-9.eInf]+$', line), line
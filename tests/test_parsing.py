@@ -0,0 +1,65 @@
+"""
+Query parsing (parsing/parsing.py): parse(), the memoized parse_query() and parse_many().
+"""
+import pytest
+from parsing.parsing import PARSE_CACHE_SIZE, _parse_query, parse, parse_many, parse_query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("IPC 23(1)", ("23", "1")),
+    ("23 subsection 2", ("23", "2")),
+    ("section 420", ("420", None)),
+    ("23 (a)", ("23", "A")),
+    ("BNS 5", ("5", None)),
+    ("1(5)", ("1", "5")),
+    ("153AA", ("153AA", None)),
+    ("29A", ("29A", None)),
+    ("23 1", (None, None)),  # spaced subsections need a subsection keyword
+    ("theft", (None, None)),
+    ("", (None, None)),
+])
+def test_parse_examples(query, expected):
+    assert parse(query) == expected
+
+
+def test_sub_section_is_stripped_as_a_whole_word():
+    # Stripping "section" first used to leave "sub-" behind, so these didn't parse
+    parsed = parse_query("1 sub-section (2)")
+    assert "sub" not in parsed.cleaned
+    assert (parsed.section, parsed.subsection, parsed.key) == ("1", "2", "1(2)")
+    assert parse("ipc 23 sub-section 1") == ("23", "1")
+    # Filler words only go when they stand alone
+    assert parse_query("subsections 2").section is None
+
+
+def test_parsed_query_fields():
+    parsed = parse_query("  BNS Section 137 (1) ")
+    assert parsed.text == "BNS Section 137 (1)"
+    assert parsed.lower == "bns section 137 (1)"
+    assert (parsed.key, parsed.base_key, parsed.number) == ("137(1)", "137", 137)
+    assert parse_query("bns 137 (1)").is_section_query
+    assert not parse_query("theft").is_section_query
+
+
+def test_memoization_is_bounded():
+    _parse_query.cache_clear()
+    assert _parse_query.cache_info().maxsize == PARSE_CACHE_SIZE
+
+    first = parse_query("420")
+    assert parse_query("420") is first
+    assert _parse_query.cache_info().hits == 1
+
+    for n in range(PARSE_CACHE_SIZE + 10):
+        parse_query(f"term {n}")
+    assert _parse_query.cache_info().currsize == PARSE_CACHE_SIZE
+    # The oldest entries were dropped
+    assert parse_query("420") is not first
+    assert parse_query("420") == first
+
+
+def test_parse_many_keeps_input_order():
+    queries = ["420", "theft", "23(1)", "420", "", None]
+    parsed = parse_many(queries)
+    assert [item.text for item in parsed] == ["420", "theft", "23(1)", "420", "", ""]
+    assert [item.section for item in parsed] == ["420", None, "23", "420", None, None]
+    assert parsed[3] is parsed[0]
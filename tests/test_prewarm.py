@@ -0,0 +1,113 @@
+"""
+Offline definition pre-warm (ai/prewarm.py), driven by a fake generator.
+"""
+import json
+import pytest
+from ai.prewarm import main, missing_definitions, prewarm
+from mapping.definitions import DefinitionStore
+
+
+def record(title, bns_section, definition=None):
+    return {"titles": title, "bns_section": [bns_section], "definition": definition}
+
+
+RECORDS = [
+    record("Theft", "303(2)"),
+    record("Murder", "103(1)"),
+    record("Dowry death", "80", definition="kept"),
+    record("Cheating", "318(4)"),
+    record("Cheating again", "318(4)"),  # same BNS section: generated once
+    record("Extortion", "308(2)", definition="None"),
+    record("Robbery", "309(4)"),
+    record("Dacoity", "310(2)"),
+]
+
+
+class BatchRecorder(DefinitionStore):
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.batches = []
+
+    def put_many(self, entries):
+        entries = list(entries)
+        self.batches.append(entries)
+        super().put_many(entries)
+
+
+@pytest.fixture
+def definitions(tmp_path):
+    return BatchRecorder(str(tmp_path / "definitions.sqlite3"))
+
+
+def generate(title):
+    if title == "Robbery":
+        return ""
+    if title == "Dacoity":
+        raise RuntimeError("quota")
+    return f"explanation of {title}"
+
+
+def quiet(*args):
+    pass
+
+
+def test_results_are_saved_in_batches_without_failures(definitions):
+    generated, failed = prewarm(RECORDS, definitions, generate, concurrency=3, batch_size=2, log=quiet)
+
+    assert (generated, failed) == (4, 2)
+    assert [len(batch) for batch in definitions.batches] == [2, 2]
+    saved = {bns_section for batch in definitions.batches for bns_section, _ in batch}
+    assert saved == {"303(2)", "103(1)", "318(4)", "308(2)"}
+    assert definitions.lookup(["318(4)"]) == "explanation of Cheating"
+    # Empty and failed responses are left out, so the next run retries them
+    assert definitions.lookup(["309(4)"]) is None
+    assert definitions.lookup(["310(2)"]) is None
+
+
+def test_rerun_skips_sections_already_logged(definitions):
+    prewarm(RECORDS, definitions, generate, batch_size=2, log=quiet)
+    assert missing_definitions(RECORDS, definitions) == [("Robbery", "309(4)"), ("Dacoity", "310(2)")]
+
+    calls = []
+
+    def recording(title):
+        calls.append(title)
+        return f"second run {title}"
+
+    definitions.batches.clear()
+    assert prewarm(RECORDS, definitions, recording, batch_size=2, log=quiet) == (2, 0)
+    assert sorted(calls) == ["Dacoity", "Robbery"]
+    assert missing_definitions(RECORDS, definitions) == []
+
+
+def test_limit_caps_the_number_of_generations(definitions):
+    calls = []
+
+    def recording(title):
+        calls.append(title)
+        return f"explanation of {title}"
+
+    assert prewarm(RECORDS, definitions, recording, concurrency=1, limit=2, log=quiet) == (2, 0)
+    assert calls == ["Theft", "Murder"]
+    assert len(missing_definitions(RECORDS, definitions)) == 4
+
+
+def test_cli_honours_limit_with_the_stub_backend(tmp_path, capsys):
+    json_path = tmp_path / "mapping.json"
+    db_path = str(tmp_path / "definitions.sqlite3")
+    json_path.write_text(json.dumps([
+        {"ipc_sec": [str(n)], "ipc_subsec": [], "terms": [title.lower()], "bns_section": [bns_section],
+         "titles": title, "change": "", "status": "Mapped", "definition": definition, "legal": None}
+        for n, (title, bns_section, definition) in enumerate(
+            (item["titles"], item["bns_section"][0], item["definition"]) for item in RECORDS
+        )
+    ]), encoding="utf-8")
+
+    args = ["--json", str(json_path), "--db", db_path, "--backend", "stub", "--concurrency", "2"]
+    assert main(args + ["--limit", "3"]) == 0
+    assert "Generated 3 definitions, 0 failed" in capsys.readouterr().out
+    assert len(missing_definitions(RECORDS, DefinitionStore(db_path))) == 3
+
+    assert main(args) == 0
+    assert "Generated 3 definitions, 0 failed" in capsys.readouterr().out
+    assert missing_definitions(RECORDS, DefinitionStore(db_path)) == []
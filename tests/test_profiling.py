@@ -0,0 +1,98 @@
+"""
+Opt-in request profiling (profiling/profiling.py), on a small Flask app so
+the real app's views stay unwrapped.
+"""
+import os
+import json
+import pstats
+import pytest
+from flask import Flask, jsonify, request
+from profiling.profiling import RequestProfiler, install
+
+
+def make_app(profiler):
+    app = Flask(__name__)
+
+    @app.route("/explain_term", methods=["POST"])
+    def explain_term():
+        return jsonify({"query": request.form.get("query")})
+
+    @app.route("/explain_batch", methods=["POST"])
+    def explain_batch():
+        return jsonify({"results": []}), 200
+
+    install(app, profiler)
+    return app.test_client()
+
+
+def profiles(directory):
+    """{stem: tags} for every profile written, oldest first."""
+    if not os.path.isdir(directory):
+        return {}
+    stems = sorted({os.path.splitext(name)[0] for name in os.listdir(directory)})
+    result = {}
+    for stem in stems:
+        with open(os.path.join(directory, stem + ".json"), encoding="utf-8") as f:
+            result[stem] = json.load(f)
+    return result
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "profiles")
+
+
+def test_only_requests_with_the_header_are_profiled(directory):
+    client = make_app(RequestProfiler(directory))
+    client.post("/explain_term", data={"query": "theft", "search_mode": "ipc"})
+    assert profiles(directory) == {}
+
+    client.post("/explain_term", data={"query": "theft", "search_mode": "ipc"}, headers={"X-Profile": "1"})
+    (stem, tags), = profiles(directory).items()
+    assert (tags["route"], tags["query"], tags["search_mode"], tags["status"]) == ("/explain_term", "theft", "ipc", 200)
+    assert stem.endswith("_explain_term_ipc")
+    stats = pstats.Stats(os.path.join(directory, stem + ".prof"))
+    assert any(name == "explain_term" for _, _, name in stats.stats)
+
+
+def test_json_body_routes_are_tagged_from_the_body(directory):
+    client = make_app(RequestProfiler(directory, output="collapsed"))
+    client.post("/explain_batch", json={"queries": ["302", "420"], "search_mode": "bns"}, headers={"X-Profile": "1"})
+    (stem, tags), = profiles(directory).items()
+    assert (tags["route"], tags["query"], tags["search_mode"]) == ("/explain_batch", "302, 420", "bns")
+    assert os.path.exists(os.path.join(directory, stem + ".collapsed"))
+
+
+def test_only_the_newest_profiles_are_kept(directory):
+    client = make_app(RequestProfiler(directory, keep=2))
+    for query in ("first", "second", "third"):
+        client.post("/explain_term", data={"query": query, "search_mode": "ipc"}, headers={"X-Profile": "1"})
+
+    kept = profiles(directory)
+    assert [tags["query"] for tags in kept.values()] == ["second", "third"]
+    assert len(os.listdir(directory)) == 4  # a .prof and a .json each
+
+
+@pytest.mark.parametrize("search_mode, tag", [("a/b", "ab"), ("../../etc", "etc"), ("x" * 300, "x" * 32), ("/", "none")])
+def test_client_search_mode_is_made_safe_for_the_filename(directory, search_mode, tag):
+    client = make_app(RequestProfiler(directory))
+    response = client.post("/explain_term", data={"query": "theft", "search_mode": search_mode},
+                           headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    (stem, tags), = profiles(directory).items()
+    assert stem.endswith(f"_explain_term_{tag}")
+    assert tags["search_mode"] == search_mode
+
+
+def test_failed_profile_write_still_returns_the_response(directory, monkeypatch, caplog):
+    profiler = RequestProfiler(directory)
+
+    def broken_rotate():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(profiler, "_rotate", broken_rotate)
+    client = make_app(profiler)
+    response = client.post("/explain_term", data={"query": "theft", "search_mode": "ipc"}, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.get_json() == {"query": "theft"}
+    assert "could not write profile" in caplog.text
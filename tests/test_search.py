@@ -0,0 +1,213 @@
+"""
+Section, prefix and substring indexes (search/). Each intended change from the
+original per-record scans sits next to a case where old and new agree.
+"""
+from parsing.parsing import parse_query, section_key
+from search.prefix import PrefixIndex, TERM_EXACT, TERM_PREFIX, TITLE_PREFIX
+from search.sections import SectionIndex
+from search.trigram import TrigramIndex
+from mapping.store import MappingSnapshot
+from services.autocomplete_service import autocomplete_service
+
+
+def _normalized(text):
+    # The original comparison: spaces and parentheses dropped, nothing else
+    return text.replace(" ", "").replace("(", "").replace(")", "").upper()
+
+
+BNS_RECORDS = [
+    {"bns_section": ["1(1)"]},
+    {"bns_section": ["11"]},
+    {"bns_section": ["103\n(1)"]},
+    {"bns_section": ["137 (1)\n(a)", "137 (1)\n(b)"]},
+    {"bns_section": ["64"]},
+]
+
+IPC_RECORDS = [
+    {"ipc_sec": ["23"], "ipc_subsec": ["1", "2"]},
+    {"ipc_sec": ["231"], "ipc_subsec": []},
+    {"ipc_sec": ["23"], "ipc_subsec": []},
+]
+
+
+def test_section_key_agrees_with_original_for_plain_references():
+    assert section_key("1 (6)") == "1(6)"
+    assert section_key("153aa") == "153AA"
+    assert section_key("23", "1") == "23(1)"
+
+
+def test_section_key_normalises_all_whitespace():
+    # The original only dropped spaces, so "103\n(1)" never matched "103(1)"
+    assert section_key("103\n(1)") == "103(1)"
+    assert section_key("329  (4)") == "329(4)"
+    assert _normalized("103\n(1)") != _normalized("103(1)")
+
+
+def test_bns_exact_section_agrees_with_original():
+    index = SectionIndex(BNS_RECORDS, "bns_section")
+    assert index.find("11") == [(1, True)]
+    assert index.find("64") == [(4, True)]
+
+
+def test_bns_subsection_no_longer_matches_concatenated_section():
+    index = SectionIndex(BNS_RECORDS, "bns_section")
+    # The original compared "1"+"1" against "11" with parentheses removed,
+    # so "1(1)" also hit section 11
+    assert _normalized("1(1)") == _normalized("11")
+    assert index.find(parse_query("1(1)").key) == [(0, True)]
+
+
+def test_bns_section_with_newline_resolves():
+    index = SectionIndex(BNS_RECORDS, "bns_section")
+    assert index.find(parse_query("103(1)").key) == [(2, True)]
+    assert index.find("103") == [(2, False)]
+
+
+def test_bns_parent_section_finds_nested_subsections():
+    index = SectionIndex(BNS_RECORDS, "bns_section")
+    assert index.find("137") == [(3, False)]
+    assert index.find("137(1)") == [(3, False)]
+    assert index.find("137(1)(A)") == [(3, True)]
+    assert index.entries("137") == ["137 (1)\n(a)", "137 (1)\n(b)"]
+    assert index.entries("999") == []
+
+
+def test_ipc_subsection_keyword_query():
+    index = SectionIndex(IPC_RECORDS, "ipc_sec", "ipc_subsec")
+    parsed = parse_query("23 subsection 1")
+    assert (parsed.section, parsed.subsection) == ("23", "1")
+    # The original matched "231" too ("23" + "1" with nothing between)
+    assert _normalized("23(1)") == _normalized("231")
+    assert index.find(parsed.key) == [(0, True)]
+
+
+def test_ipc_bare_section_agrees_with_original():
+    index = SectionIndex(IPC_RECORDS, "ipc_sec", "ipc_subsec")
+    assert index.find("231") == [(1, True)]
+    # "23" is cited as itself by both records; record 0 also files "23(1)", "23(2)"
+    assert index.find("23") == [(0, True), (2, True)]
+    assert index.entries("23") == ["23", "23(1)", "23(2)"]
+
+
+def test_containing_matches_raw_section_strings():
+    index = SectionIndex(BNS_RECORDS, "bns_section")
+    assert index.containing("1") == [0, 1, 2, 3]
+    assert index.containing("64") == [4]
+
+
+TERM_RECORDS = [
+    {"terms": ["theft", "stealing"], "titles": "Theft"},
+    {"terms": ["theft of vehicle"], "titles": "Punishment for theft"},
+    {"terms": ["robbery"], "titles": "Theft by robbery"},
+    {"terms": ["Murder"], "titles": "Murder"},
+]
+
+
+def _original_tiers(records, query_lower):
+    # The original per-record loop: exact term, term prefix, title prefix
+    tiers = {}
+    for idx, item in enumerate(records):
+        if any(query_lower == term.lower() for term in item["terms"]):
+            tiers[idx] = 80
+        elif any(term.lower().startswith(query_lower) for term in item["terms"]):
+            tiers[idx] = 70
+        elif item["titles"].lower().startswith(query_lower):
+            tiers[idx] = 60
+    return tiers
+
+
+def test_prefix_tiers_in_order():
+    assert TERM_EXACT > TERM_PREFIX > TITLE_PREFIX
+    tiers = PrefixIndex(TERM_RECORDS).search("theft")
+    assert tiers == {0: TERM_EXACT, 1: TERM_PREFIX, 2: TITLE_PREFIX}
+
+
+def test_prefix_tiers_agree_with_original_loop():
+    index = PrefixIndex(TERM_RECORDS)
+    for query in ("theft", "the", "t", "rob", "murder", "mur", "punish", "zz"):
+        assert index.search(query) == _original_tiers(TERM_RECORDS, query), query
+
+
+def test_trigram_agrees_with_substring_scan():
+    texts = [("theft of vehicle", 0), ("robbery", 1), ("theft", 2), ("theft", 3), ("dacoity", 4)]
+    index = TrigramIndex(texts)
+    for query in ("eft", "theft", "ob", "t", "ty", "vehicle", "xyz", "ft o"):
+        expected = sorted({doc for text, doc in texts if query in text})
+        assert index.search(query) == expected, query
+
+
+def test_trigram_requires_every_gram_in_order():
+    index = TrigramIndex([("theft", 0), ("left the", 1)])
+    # "the" and "eft" both occur in "left the", but not as "theft"
+    assert index.search("theft") == [0]
+    assert index.search("") == [0, 1]
+
+
+def test_ipc_lettered_subsection_falls_back_to_lettered_section():
+    records = IPC_RECORDS + [{"ipc_sec": ["326A"], "ipc_subsec": []}, {"ipc_sec": ["326B"], "ipc_subsec": []}]
+    index = SectionIndex(records, "ipc_sec", "ipc_subsec")
+    # The original's flattened comparison matched "326(a)" against "326A"
+    assert _normalized("326(a)") == _normalized("326A")
+    for query, expected in (("326(a)", 3), ("326 (a)", 3), ("326(b)", 4)):
+        parsed = parse_query(query)
+        assert index.find(parsed.key) == []
+        assert index.find_any(parsed.key, parsed.joined_key) == [(expected, True)], query
+    # Numeric subsections never join onto the section: "23(1)" is not "231"
+    parsed = parse_query("23(1)")
+    assert parsed.joined_key == ""
+    assert index.find_any(parsed.key, parsed.joined_key) == [(0, True)]
+
+
+class _Store:
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+
+class _Counting:
+    """Wraps an index and records every search() made through it."""
+
+    def __init__(self, index, name, calls):
+        self.index, self.name, self.calls = index, name, calls
+
+    def search(self, query):
+        self.calls.append(self.name)
+        return self.index.search(query)
+
+
+def _mapping_snapshot():
+    with open("mapping/mapping.json", "rb") as f:
+        return MappingSnapshot.from_json(f.read())
+
+
+def test_top_k_matches_full_ranking_cut_to_k():
+    store = _Store(_mapping_snapshot())
+    for mode, query in (("ipc", "theft"), ("ipc", "the"), ("ipc", "302"), ("ipc", "23"), ("ipc", "murder"),
+                        ("bns", "103"), ("bns", "1"), ("bns", "cheat"), ("bns", "hurt"), ("ipc", "zzzz")):
+        ranked = autocomplete_service(query, mode, store, limit=None)
+        for k in (1, 3, 10):
+            assert autocomplete_service(query, mode, store, limit=k) == ranked[:k], (mode, query, k)
+
+
+def test_lower_tiers_are_skipped_once_the_top_k_is_settled():
+    snapshot = _mapping_snapshot()
+    calls = []
+    snapshot.prefixes = _Counting(snapshot.prefixes, "prefix", calls)
+    snapshot.infixes = {name: _Counting(index, name, calls) for name, index in snapshot.infixes.items()}
+    store = _Store(snapshot)
+
+    # Exact/prefix term hits (70-80) fill the top 2; substring tiers top out at 50
+    assert len(autocomplete_service("theft", "ipc", store, limit=2)) == 2
+    assert calls == ["prefix"]
+
+    # A section hit (100) beats every term tier
+    calls.clear()
+    assert len(autocomplete_service("302", "ipc", store, limit=1)) == 1
+    assert calls == []
+
+    # Unbounded, or when the top k can't fill up, every tier is scanned
+    calls.clear()
+    autocomplete_service("theft", "ipc", store, limit=None)
+    assert calls == ["prefix", "terms", "titles"]
@@ -0,0 +1,87 @@
+"""
+Prebuilt mapping snapshot (mapping/snapshot.py) and the MappingStore that loads it (mapping/store.py).
+"""
+import json
+import pandas as pd
+import pytest
+from mapping import store as store_module
+from mapping.snapshot import build_snapshot
+from mapping.store import MappingSnapshot, MappingStore, load_snapshot, read_snapshot_header
+
+ROWS = [
+    {"ipc_sec": "379", "ipc_subsec": None, "title": "Theft", "bns": "303(2)", "change": "", "term": "theft",
+     "definition": None, "legal": None},
+    {"ipc_sec": "302", "ipc_subsec": None, "title": "Murder", "bns": "103(1)", "change": "", "term": "murder",
+     "definition": "kept", "legal": None},
+]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    excel_path, json_path, snapshot_path = (str(tmp_path / name) for name in ("mapping.xlsx", "mapping.json", "mapping.pkl"))
+    pd.DataFrame(ROWS).to_excel(excel_path, index=False)
+    return excel_path, json_path, snapshot_path
+
+
+def test_build_is_skipped_while_the_workbook_is_unchanged(paths):
+    assert build_snapshot(*paths)
+    assert not build_snapshot(*paths)
+    assert build_snapshot(*paths, force=True)
+
+    header = read_snapshot_header(paths[2])
+    snapshot = load_snapshot(paths[2], header["version"])
+    assert [item["titles"] for item in snapshot] == ["Theft", "Murder"]
+    assert snapshot.titles == {"Theft": 0, "Murder": 1}
+    assert snapshot.sections["ipc"].find("379") == [(0, True)]
+
+
+def test_workbook_change_rebuilds(paths):
+    excel_path, json_path, _ = paths
+    build_snapshot(*paths)
+    pd.DataFrame(ROWS + [dict(ROWS[0], ipc_sec="420", title="Cheating", bns="318(4)", term="cheating")]).to_excel(
+        excel_path, index=False
+    )
+    assert build_snapshot(*paths)
+    with open(json_path, encoding="utf-8") as f:
+        assert [item["titles"] for item in json.load(f)] == ["Theft", "Murder", "Cheating"]
+
+
+def test_format_bump_rebuilds(paths, monkeypatch):
+    build_snapshot(*paths)
+    monkeypatch.setattr(store_module, "SNAPSHOT_FORMAT", store_module.SNAPSHOT_FORMAT + 1)
+    # Snapshots in the old format are unreadable, so the build runs again
+    assert read_snapshot_header(paths[2]) is None
+    assert build_snapshot(*paths)
+    assert read_snapshot_header(paths[2])["format"] == store_module.SNAPSHOT_FORMAT
+    assert not build_snapshot(*paths)
+
+
+def test_store_loads_prebuilt_snapshot_and_falls_back_to_json_after_an_edit(paths, monkeypatch):
+    _, json_path, snapshot_path = paths
+    build_snapshot(*paths)
+
+    parsed = []
+    from_json = MappingSnapshot.from_json.__func__
+
+    def counting_from_json(cls, raw):
+        parsed.append(1)
+        return from_json(cls, raw)
+
+    monkeypatch.setattr(MappingSnapshot, "from_json", classmethod(counting_from_json))
+
+    store = MappingStore(json_path, snapshot_path)
+    assert store.snapshot().version == read_snapshot_header(snapshot_path)["version"]
+    assert parsed == []  # served from the snapshot, no JSON parse
+
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    data[0]["titles"] = "Theft (edited)"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    # The snapshot no longer matches mapping.json, so the JSON wins
+    snapshot = store.snapshot()
+    assert parsed == [1]
+    assert snapshot.records[0]["titles"] == "Theft (edited)"
+    assert snapshot.titles["Theft (edited)"] == 0
+    assert snapshot.version != read_snapshot_header(snapshot_path)["version"]